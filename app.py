@@ -32,6 +32,7 @@ except ImportError:
 try:
     from core.reminder_system import (
         SmartReminderSystem, 
+        get_reminder_system,
         create_reminders_from_prescription,
         get_current_notifications,
         mark_dose_taken,
@@ -43,6 +44,8 @@ except ImportError:
     class SmartReminderSystem:
         def __init__(self):
             self.medication_reminders = {}
+    def get_reminder_system():
+        return SmartReminderSystem()
     def create_reminders_from_prescription(entities):
         return []
     def get_current_notifications():
@@ -106,7 +109,7 @@ if 'current_step' not in st.session_state:
 
 # Initialize new features if available
 if REMINDERS_AVAILABLE and 'reminder_system' not in st.session_state:
-    st.session_state.reminder_system = SmartReminderSystem()
+    st.session_state.reminder_system = get_reminder_system()
 if NEW_FEATURES_AVAILABLE and 'therapy_bot' not in st.session_state:
     st.session_state.therapy_bot = TherapyDoctorBot()
 if 'chat_history' not in st.session_state:
@@ -903,8 +906,8 @@ def show_medication_reminders():
                         with col4:
                             if st.button("🗑️", key=f"delete_{reminder_id}"):
                                 if hasattr(reminder, 'is_active'):
-                                    reminder.is_active = False
-                                    reminder_system.save_data()
+                                    reminder_system.deactivate_reminder(reminder_id)
+                                    reminder_system.flush()
                                 st.rerun()
                         
                         st.markdown("---")
@@ -1,6 +1,7 @@
 import re
 import logging
-from typing import List, Dict, Any
+from functools import lru_cache
+from typing import List, Dict, Any, Tuple
 from transformers import AutoTokenizer, AutoModelForTokenClassification, pipeline
 import torch
 
@@ -20,9 +21,29 @@ class MedicalNER:
         """Load the medical NER model"""
         try:
             logger.info("Loading medical NER model...")
-            self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+            # The Rust tokenizer is much faster than the Python one; transformers
+            # converts the slow BERT vocabulary on the fly if no tokenizer.json exists
+            self.tokenizer = AutoTokenizer.from_pretrained(self.model_name, use_fast=True)
+            if not self.tokenizer.is_fast:
+                logger.warning("Fast tokenizer unavailable, using slow Python tokenizer")
+            
+            # Warm up the tokenizer so the first real request does not pay for it
+            self.tokenizer("Aspirin 325mg twice daily")
             self.model = AutoModelForTokenClassification.from_pretrained(self.model_name)
             
+            # Inference only: freeze weights so autograd never tracks them
+            self.model.eval()
+            for param in self.model.parameters():
+                param.requires_grad_(False)
+            
+            # Avoid inter-op thread oversubscription on CPU
+            if not torch.cuda.is_available():
+                try:
+                    torch.set_num_interop_threads(1)
+                except RuntimeError:
+                    # Can only be set before the first parallel op in the process
+                    pass
+            
             # Create pipeline
             self.ner_pipeline = pipeline(
                 "ner", 
@@ -44,8 +65,9 @@ class MedicalNER:
             return []
             
         try:
-            # Run NER pipeline
-            entities = self.ner_pipeline(text)
+            # Run NER pipeline without autograd bookkeeping
+            with torch.inference_mode():
+                entities = self.ner_pipeline(text)
             
             # Process and clean entities
             processed_entities = []
@@ -264,6 +286,40 @@ def normalize_frequency(frequency: str) -> str:
     
     return frequency.strip()
 
+@lru_cache(maxsize=256)
+def _extract_prescriptions(text: str) -> Tuple[Dict[str, Any], ...]:
+    """
+    Run NER on text and return normalized prescriptions
+    
+    Results are cached by text, so repeated analysis of the same
+    prescription skips the model entirely. Callers must copy the
+    returned dictionaries before modifying them.
+    """
+    # Initialize NER model
+    ner_model = MedicalNER()
+    
+    # Try transformer model first
+    entities = ner_model.extract_with_transformer(text)
+    
+    # If transformer fails or returns few results, use rule-based
+    if len(entities) < 2:
+        logger.info("Using rule-based NER as fallback")
+        entities = ner_model.extract_with_rules(text)
+    
+    # Group entities into prescriptions
+    prescriptions = group_entities(entities, text)
+    
+    # Clean and normalize
+    for prescription in prescriptions:
+        if prescription.get('drug'):
+            prescription['drug'] = clean_drug_name(prescription['drug'])
+        if prescription.get('dose'):
+            prescription['dose'] = normalize_dose(prescription['dose'])
+        if prescription.get('frequency'):
+            prescription['frequency'] = normalize_frequency(prescription['frequency'])
+    
+    return tuple(prescriptions)
+
 def extract_entities(text: str) -> List[Dict[str, Any]]:
     """
     Main function to extract medical entities from text
@@ -279,28 +335,8 @@ def extract_entities(text: str) -> List[Dict[str, Any]]:
         return []
     
     try:
-        # Initialize NER model
-        ner_model = MedicalNER()
-        
-        # Try transformer model first
-        entities = ner_model.extract_with_transformer(text)
-        
-        # If transformer fails or returns few results, use rule-based
-        if len(entities) < 2:
-            logger.info("Using rule-based NER as fallback")
-            entities = ner_model.extract_with_rules(text)
-        
-        # Group entities into prescriptions
-        prescriptions = group_entities(entities, text)
-        
-        # Clean and normalize
-        for prescription in prescriptions:
-            if prescription.get('drug'):
-                prescription['drug'] = clean_drug_name(prescription['drug'])
-            if prescription.get('dose'):
-                prescription['dose'] = normalize_dose(prescription['dose'])
-            if prescription.get('frequency'):
-                prescription['frequency'] = normalize_frequency(prescription['frequency'])
+        # Copy so callers can annotate results without touching the cache
+        prescriptions = [dict(prescription) for prescription in _extract_prescriptions(text)]
         
         logger.info(f"✅ Extracted {len(prescriptions)} drug prescriptions")
         return prescriptions
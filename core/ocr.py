@@ -1,4 +1,8 @@
 import io
+import os
+import hashlib
+import threading
+from collections import OrderedDict
 import cv2
 import numpy as np
 import pytesseract
@@ -7,10 +11,44 @@ from pdf2image import convert_from_bytes
 import logging
 import re
 
+try:
+    import pdfplumber
+    PDFPLUMBER_AVAILABLE = True
+except ImportError:
+    PDFPLUMBER_AVAILABLE = False
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def get_tessdata_fast_dir():
+    """
+    Locate the integer-quantized tessdata_fast models, if configured
+    
+    Set TESSDATA_FAST_DIR to a directory containing the tessdata_fast
+    eng.traineddata to trade a little accuracy for roughly twice the
+    OCR throughput. Falls back to Tesseract's default models otherwise.
+    """
+    tessdata_dir = os.getenv('TESSDATA_FAST_DIR')
+    if not tessdata_dir:
+        return None
+    
+    if not os.path.isfile(os.path.join(tessdata_dir, 'eng.traineddata')):
+        logger.warning(f"TESSDATA_FAST_DIR has no eng.traineddata: {tessdata_dir}")
+        return None
+    
+    return tessdata_dir
+
+TESSDATA_FAST_DIR = get_tessdata_fast_dir()
+
+def build_tesseract_config(config: str = '') -> str:
+    """
+    Add the tessdata_fast model directory to a Tesseract config string
+    """
+    if not TESSDATA_FAST_DIR:
+        return config
+    return f'--tessdata-dir "{TESSDATA_FAST_DIR}" {config}'.strip()
+
 def preprocess_image(image):
     """
     Preprocess image for better OCR accuracy
@@ -63,6 +101,22 @@ def deskew_image(image):
     
     return image
 
+# Longest image edge passed to OCR; roughly an A4/Letter page at 200 dpi
+MAX_OCR_IMAGE_EDGE = 2200
+
+def downscale_image(image, max_edge: int = MAX_OCR_IMAGE_EDGE):
+    """
+    Shrink an image so its longest edge is at most max_edge pixels
+    """
+    longest_edge = max(image.size)
+    if longest_edge <= max_edge:
+        return image
+    
+    scale = max_edge / longest_edge
+    new_size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+    logger.info(f"Downscaling image from {image.size} to {new_size} for OCR")
+    return image.resize(new_size, Image.LANCZOS)
+
 def extract_text_from_image(image_bytes):
     """
     Extract text from image bytes using improved OCR
@@ -75,6 +129,9 @@ def extract_text_from_image(image_bytes):
         if image.mode != 'RGB':
             image = image.convert('RGB')
         
+        # Tesseract gains nothing beyond ~200 dpi, so shrink large scans
+        image = downscale_image(image)
+        
         # Try multiple OCR configurations for better accuracy
         ocr_configs = [
             r'--oem 3 --psm 6 -c tessedit_char_whitelist=0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz.,;:()[]{}/"- ',
@@ -93,7 +150,7 @@ def extract_text_from_image(image_bytes):
                 pil_image = Image.fromarray(processed_image)
                 
                 # Extract text
-                text = pytesseract.image_to_string(pil_image, config=config)
+                text = pytesseract.image_to_string(pil_image, config=build_tesseract_config(config))
                 
                 # Score based on length and medical keywords
                 score = len(text.strip())
@@ -117,7 +174,7 @@ def extract_text_from_image(image_bytes):
             processed_image = preprocess_image(image)
             deskewed_image = deskew_image(processed_image)
             pil_image = Image.fromarray(deskewed_image)
-            best_text = pytesseract.image_to_string(pil_image)
+            best_text = pytesseract.image_to_string(pil_image, config=build_tesseract_config())
         
         # Clean extracted text
         cleaned_text = clean_extracted_text_improved(best_text)
@@ -171,6 +228,41 @@ def enhance_image_for_ocr(image):
     
     return cleaned
 
+# Common OCR errors for medical terms, fused into a single alternation so the
+# text is scanned once instead of once per correction
+_MED_FIX_MAP = {
+    # Common drug name corrections
+    'mg': 'mg',
+    'rnl': 'ml',
+    'rng': 'mg',
+    'mcg': 'mcg',
+    'tab': 'tablet',
+    'cap': 'capsule',
+    
+    # Common frequency corrections
+    'bid': 'twice daily',
+    'tid': 'three times daily',
+    'qid': 'four times daily',
+    'qd': 'once daily',
+    'prn': 'as needed',
+}
+
+_MED_FIX_RE = re.compile(
+    r'\b(mg|rnl|rng|mcg|tab|cap|bid|tid|qid|qd|prn)\b|R[x×]\s*:',
+    re.IGNORECASE
+)
+
+# Characters that are obviously OCR artifacts (medical symbols are kept)
+_OCR_ARTIFACT_RE = re.compile(r'[^\w\s\-\.\,\(\)\[\]\/\:\%\+\=]')
+
+def _med_fix_replacement(match) -> str:
+    """Replacement callback for _MED_FIX_RE"""
+    term = match.group(1)
+    if term is None:
+        # Clean up prescription formatting ("Rx:" / "R×:")
+        return 'Prescription:'
+    return _MED_FIX_MAP[term.lower()]
+
 def clean_extracted_text_improved(text: str) -> str:
     """
     Advanced text cleaning for medical prescriptions
@@ -181,43 +273,61 @@ def clean_extracted_text_improved(text: str) -> str:
     # Remove excessive whitespace
     text = ' '.join(text.split())
     
-    # Fix common OCR errors for medical terms
-    medical_corrections = {
-        # Common drug name corrections
-        r'\bmg\b': 'mg',
-        r'\brnl\b': 'ml',
-        r'\brng\b': 'mg',
-        r'\bmcg\b': 'mcg',
-        r'\btab\b': 'tablet',
-        r'\bcap\b': 'capsule',
-        
-        # Common frequency corrections
-        r'\bbid\b': 'twice daily',
-        r'\btid\b': 'three times daily',
-        r'\bqid\b': 'four times daily',
-        r'\bqd\b': 'once daily',
-        r'\bprn\b': 'as needed',
-        
-        # Clean up prescription formatting
-        r'Rx\s*:': 'Prescription:',
-        r'R[x×]\s*:': 'Prescription:',
-    }
-    
-    for pattern, replacement in medical_corrections.items():
-        text = re.sub(pattern, replacement, text, flags=re.IGNORECASE)
+    # Fix common OCR errors for medical terms and prescription formatting
+    text = _MED_FIX_RE.sub(_med_fix_replacement, text)
     
     # Remove obviously wrong characters but keep medical symbols
-    text = re.sub(r'[^\w\s\-\.\,\(\)\[\]\/\:\%\+\=]', '', text)
+    text = _OCR_ARTIFACT_RE.sub('', text)
     
     return text.strip()
 
+# Minimum amount of embedded text for a PDF to be treated as digital
+MIN_NATIVE_PDF_CHARS = 100
+
+# Only the first pages of a PDF are analyzed
+MAX_PDF_PAGES = 5
+
+PAGE_BREAK = "\n\n--- PAGE BREAK ---\n\n"
+
+def extract_native_pdf_text(pdf_bytes) -> str:
+    """
+    Extract embedded text from a digital PDF without OCR
+    
+    Returns an empty string when the PDF has no usable text layer
+    (e.g. scanned prescriptions), so the caller can fall back to OCR.
+    """
+    if not PDFPLUMBER_AVAILABLE:
+        return ""
+    
+    try:
+        with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+            page_texts = [
+                page.extract_text() or ""
+                for page in pdf.pages[:MAX_PDF_PAGES]
+            ]
+    except Exception as e:
+        logger.warning(f"Native PDF text extraction failed: {e}")
+        return ""
+    
+    if sum(len(text.strip()) for text in page_texts) <= MIN_NATIVE_PDF_CHARS:
+        return ""
+    
+    logger.info(f"Extracted embedded text from {len(page_texts)} PDF pages")
+    return PAGE_BREAK.join(clean_extracted_text_improved(text) for text in page_texts)
+
 def extract_text_from_pdf(pdf_bytes):
     """
-    Extract text from PDF by converting to images first
+    Extract text from PDF, using the embedded text layer when present
+    and converting pages to images for OCR otherwise
     """
+    # Digital prescriptions already carry their text; skip OCR entirely
+    native_text = extract_native_pdf_text(pdf_bytes)
+    if native_text:
+        return native_text
+    
     try:
         # Convert PDF pages to images
-        images = convert_from_bytes(pdf_bytes, dpi=300, first_page=1, last_page=5)  # Limit to first 5 pages
+        images = convert_from_bytes(pdf_bytes, dpi=200, first_page=1, last_page=MAX_PDF_PAGES)
         
         extracted_texts = []
         
@@ -234,7 +344,7 @@ def extract_text_from_pdf(pdf_bytes):
             extracted_texts.append(page_text)
         
         # Combine all pages
-        full_text = "\n\n--- PAGE BREAK ---\n\n".join(extracted_texts)
+        full_text = PAGE_BREAK.join(extracted_texts)
         
         logger.info(f"Successfully extracted text from {len(images)} PDF pages")
         return full_text
@@ -276,6 +386,28 @@ def clean_extracted_text(text):
     
     return text.strip()
 
+# Content-addressed cache of OCR results, so re-submitting the same file
+# does not re-run the whole OCR pipeline
+OCR_CACHE_SIZE = 64
+_ocr_cache: "OrderedDict[tuple, str]" = OrderedDict()
+_ocr_cache_lock = threading.Lock()
+
+def _get_cached_text(cache_key: tuple):
+    """Return the cached OCR text for a key, or None"""
+    with _ocr_cache_lock:
+        text = _ocr_cache.get(cache_key)
+        if text is not None:
+            _ocr_cache.move_to_end(cache_key)
+        return text
+
+def _cache_text(cache_key: tuple, text: str):
+    """Store an OCR result, evicting the least recently used entry"""
+    with _ocr_cache_lock:
+        _ocr_cache[cache_key] = text
+        _ocr_cache.move_to_end(cache_key)
+        while len(_ocr_cache) > OCR_CACHE_SIZE:
+            _ocr_cache.popitem(last=False)
+
 def extract_text(file_bytes: bytes, file_type: str) -> str:
     """
     Main function to extract text from uploaded file with demo fallback
@@ -287,13 +419,23 @@ def extract_text(file_bytes: bytes, file_type: str) -> str:
     Returns:
         Extracted text as string
     """
+    cache_key = (hashlib.blake2b(file_bytes).hexdigest(), file_type)
+    cached_text = _get_cached_text(cache_key)
+    if cached_text is not None:
+        logger.info("Using cached OCR result for previously seen file")
+        return cached_text
+    
     try:
         if file_type.startswith('image/'):
-            return extract_text_from_image(file_bytes)
+            text = extract_text_from_image(file_bytes)
         elif file_type == 'application/pdf':
-            return extract_text_from_pdf(file_bytes)
+            text = extract_text_from_pdf(file_bytes)
         else:
             raise ValueError(f"Unsupported file type: {file_type}")
+        
+        # Only real extractions are cached; demo text is never reused
+        _cache_text(cache_key, text)
+        return text
             
     except Exception as e:
         logger.error(f"Text extraction failed: {e}")
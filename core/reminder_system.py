@@ -1,17 +1,121 @@
 import os
+import re
+import sys
 import json
+import atexit
 import logging
+import math
+import itertools
+import threading
+import weakref
+from bisect import bisect_left
 from datetime import datetime, timedelta, time
 from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 import pandas as pd
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, field, fields
 from enum import Enum
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Logging is configured by the application
 logger = logging.getLogger(__name__)
 
+# Mutations are batched and written this many seconds after the first change
+SAVE_DEBOUNCE_SECONDS = 5.0
+
+# Number of reminder log entries kept; the log file is compacted back to this
+# size once it holds twice as many lines
+MAX_LOG_ENTRIES = 1000
+
+# Frequency patterns mapped to reminder times, most specific first so that
+# e.g. "three times daily" is not caught by the generic "daily" rule
+FREQUENCY_TIME_PATTERNS = [
+    (re.compile(r'\b(?:q4h|every\s*4\s*hours?)\b'), ('06:00', '10:00', '14:00', '18:00', '22:00')),
+    (re.compile(r'\b(?:q6h|every\s*6\s*hours?)\b'), ('06:00', '12:00', '18:00', '24:00')),
+    (re.compile(r'\b(?:q8h|every\s*8\s*hours?)\b'), ('08:00', '16:00', '24:00')),
+    (re.compile(r'\b(?:qid|four\s*times)\b'), ('08:00', '12:00', '16:00', '20:00')),
+    (re.compile(r'\b(?:tid|three\s*times)\b'), ('08:00', '14:00', '20:00')),
+    (re.compile(r'\b(?:bid|twice)\b'), ('08:00', '20:00')),
+    (re.compile(r'\b(?:bedtime|night\w*)\b'), ('22:00',)),
+    (re.compile(r'\b(?:once|daily|morning)\b'), ('08:00',)),
+]
+
+# Medication reminders within this many minutes of their time are shown
+DUE_WINDOW_MINUTES = 30
+
+MINUTES_PER_DAY = 24 * 60
+
+def time_to_minutes(time_str: str) -> int:
+    """Convert an 'HH:MM' time to minutes past midnight ('24:00' is midnight)"""
+    hours, minutes = time_str.split(':')
+    return (int(hours) * 60 + int(minutes)) % MINUTES_PER_DAY
+
+def minute_ranges(start: float, end: float) -> List[Tuple[int, int]]:
+    """Split a minute-of-day window into ranges that do not cross midnight"""
+    if start < 0:
+        return [(math.ceil(start) + MINUTES_PER_DAY, MINUTES_PER_DAY - 1), (0, math.floor(end))]
+    if end >= MINUTES_PER_DAY:
+        return [(math.ceil(start), MINUTES_PER_DAY - 1), (0, math.floor(end) - MINUTES_PER_DAY)]
+    return [(math.ceil(start), math.floor(end))]
+
+# Common medication instructions
+MEDICATION_INSTRUCTIONS = {
+    'aspirin': 'Take with food to prevent stomach upset',
+    'ibuprofen': 'Take with food or milk',
+    'paracetamol': 'Can be taken with or without food',
+    'acetaminophen': 'Can be taken with or without food',
+    'metformin': 'Take with meals to reduce stomach upset',
+    'lisinopril': 'Take at the same time each day',
+    'atorvastatin': 'Take at bedtime for best effect',
+    'simvastatin': 'Take in the evening with dinner',
+    'warfarin': 'Take at the same time daily, avoid alcohol',
+    'digoxin': 'Take on empty stomach, check pulse',
+    'furosemide': 'Take in morning to avoid nighttime urination',
+    'amlodipine': 'Take at the same time each day'
+}
+
+# All drug names in one alternation, so a name is scanned once
+MEDICATION_INSTRUCTIONS_PATTERN = re.compile(
+    '|'.join(re.escape(drug) for drug in MEDICATION_INSTRUCTIONS)
+)
+
+def dumps_json(data) -> bytes:
+    """Serialize data to indented JSON bytes, using orjson when available"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, indent=2).encode('utf-8')
+
+def loads_json(raw: bytes):
+    """Parse JSON bytes, using orjson when available"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+def dumps_json_line(entry: Dict) -> bytes:
+    """Serialize one entry as a compact JSON Lines record"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(entry) + b'\n'
+    return json.dumps(entry, separators=(',', ':')).encode('utf-8') + b'\n'
+
+def write_atomic(path: Path, data: bytes):
+    """Replace a file's contents so readers never see a partial write"""
+    tmp_path = path.with_suffix(path.suffix + '.tmp')
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+def parse_timestamp(value: str) -> Optional[datetime]:
+    """Parse a stored ISO timestamp, or None if it is malformed"""
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        logger.warning(f"Ignoring malformed reminder timestamp: {value!r}")
+        return None
+
 class ReminderType(Enum):
     MEDICATION = "medication"
     WATER = "water"
@@ -41,6 +145,25 @@ class MedicationReminder:
     total_doses_taken: int = 0
     total_doses_prescribed: int = 0
     is_active: bool = True
+    
+    # Runtime caches, not persisted: parsed last_taken and (minute of day, time)
+    # for each valid time
+    last_taken_dt: Optional[datetime] = field(default=None, init=False, repr=False, compare=False)
+    time_slots: Optional[Tuple[Tuple[int, str], ...]] = field(default=None, init=False, repr=False, compare=False)
+    
+    def compute_time_slots(self) -> Tuple[Tuple[int, str], ...]:
+        """Intern the reminder times and cache their minute of day"""
+        self.times = [sys.intern(time_str) for time_str in self.times]
+        
+        slots = []
+        for time_str in self.times:
+            try:
+                slots.append((time_to_minutes(time_str), time_str))
+            except ValueError:
+                logger.warning(f"Ignoring invalid reminder time '{time_str}' for {self.id}")
+        
+        self.time_slots = tuple(slots)
+        return self.time_slots
 
 @dataclass
 class WaterReminder:
@@ -54,6 +177,30 @@ class WaterReminder:
     is_active: bool = True
     current_intake: int = 0  # Glasses consumed today
     last_reminder: Optional[str] = None
+    
+    # Parsed last_reminder, cached so polls do not re-parse it; not persisted
+    last_reminder_dt: Optional[datetime] = field(default=None, init=False, repr=False, compare=False)
+
+# Persisted fields per reminder class; init=False fields are runtime-only
+STORED_FIELDS = {
+    cls: tuple(f.name for f in fields(cls) if f.init)
+    for cls in (MedicationReminder, WaterReminder)
+}
+
+def reminder_to_dict(reminder) -> Dict:
+    """Shallow dict of a reminder's stored fields, without asdict's deep copy"""
+    return {name: getattr(reminder, name) for name in STORED_FIELDS[type(reminder)]}
+
+# Reminder systems with possibly unsaved changes, held weakly so that
+# short-lived instances are not kept alive until exit
+_live_systems: "weakref.WeakSet[SmartReminderSystem]" = weakref.WeakSet()
+
+def _flush_live_systems():
+    """Write pending changes of every live reminder system on shutdown"""
+    for system in list(_live_systems):
+        system.flush()
+
+atexit.register(_flush_live_systems)
 
 class SmartReminderSystem:
     """
@@ -66,67 +213,208 @@ class SmartReminderSystem:
         
         self.med_reminders_file = self.data_dir / "medication_reminders.json"
         self.water_reminders_file = self.data_dir / "water_reminders.json"
-        self.reminder_log_file = self.data_dir / "reminder_log.json"
+        # Append-only JSON Lines log; the JSON array file is the old format
+        self.reminder_log_file = self.data_dir / "reminder_log.jsonl"
+        self.legacy_reminder_log_file = self.data_dir / "reminder_log.json"
         
         self.medication_reminders: Dict[str, MedicationReminder] = {}
         self.water_reminders: Dict[str, WaterReminder] = {}
-        self.reminder_log: List[Dict] = []
+        # Reminder log entries, read lazily on first access of reminder_log
+        self._reminder_log: Optional[List[Dict]] = None
+        
+        # Sorted (minute of day, reminder id, time) entries for due-time lookups
+        self._med_time_index: List[Tuple[int, str, str]] = []
+        
+        # Running adherence totals, kept up to date by the mutation methods
+        self._totals = {'taken': 0, 'prescribed': 0, 'active_count': 0, 'active_streak_sum': 0}
+        
+        # Number of medication reminders the index and totals were built from
+        self._indexed_reminder_count = 0
+        
+        # Log entries not yet appended to disk, and lines currently in the file
+        # (None until counted)
+        self._pending_log: List[Dict] = []
+        self._log_file_entries: Optional[int] = None
+        
+        # Categories with unsaved changes ('med', 'water', 'log')
+        self._dirty = {'med': False, 'water': False, 'log': False}
+        self._save_timer: Optional[threading.Timer] = None
+        self._save_lock = threading.RLock()
+        
+        # Hash of the last bytes written per category, to skip no-op rewrites
+        self._saved_hashes: Dict[str, Optional[int]] = {'med': None, 'water': None}
         
         self.load_data()
+        
+        # Make sure pending changes are not lost on shutdown
+        _live_systems.add(self)
 
     def load_data(self):
         """Load reminders from storage"""
         try:
             # Load medication reminders
             if self.med_reminders_file.exists():
-                with open(self.med_reminders_file, 'r') as f:
-                    data = json.load(f)
-                    self.medication_reminders = {
-                        k: MedicationReminder(**v) for k, v in data.items()
-                    }
+                data = loads_json(self.med_reminders_file.read_bytes())
+                self.medication_reminders = {
+                    k: MedicationReminder(**v) for k, v in data.items()
+                }
+                for reminder in self.medication_reminders.values():
+                    if reminder.last_taken:
+                        reminder.last_taken_dt = parse_timestamp(reminder.last_taken)
             
             # Load water reminders
             if self.water_reminders_file.exists():
-                with open(self.water_reminders_file, 'r') as f:
-                    data = json.load(f)
-                    self.water_reminders = {
-                        k: WaterReminder(**v) for k, v in data.items()
-                    }
+                data = loads_json(self.water_reminders_file.read_bytes())
+                self.water_reminders = {
+                    k: WaterReminder(**v) for k, v in data.items()
+                }
+                for reminder in self.water_reminders.values():
+                    reminder.start_time = sys.intern(reminder.start_time)
+                    reminder.end_time = sys.intern(reminder.end_time)
+                    if reminder.last_reminder:
+                        reminder.last_reminder_dt = parse_timestamp(reminder.last_reminder)
             
-            # Load reminder log
-            if self.reminder_log_file.exists():
-                with open(self.reminder_log_file, 'r') as f:
-                    self.reminder_log = json.load(f)
+            # The reminder log itself is only read when first needed
+            if not self.reminder_log_file.exists() and self.legacy_reminder_log_file.exists():
+                self.migrate_legacy_log()
+            self._reminder_log = None
+            self._log_file_entries = None
             
-            logger.info("✅ Reminder data loaded successfully")
+            self._rebuild_indexes()
+            
+            logger.debug("Reminder data loaded")
             
         except Exception as e:
             logger.error(f"Error loading reminder data: {e}")
 
-    def save_data(self):
-        """Save reminders to storage"""
-        try:
-            # Save medication reminders
-            med_data = {k: asdict(v) for k, v in self.medication_reminders.items()}
-            with open(self.med_reminders_file, 'w') as f:
-                json.dump(med_data, f, indent=2)
-            
-            # Save water reminders  
-            water_data = {k: asdict(v) for k, v in self.water_reminders.items()}
-            with open(self.water_reminders_file, 'w') as f:
-                json.dump(water_data, f, indent=2)
-            
-            # Save reminder log (keep last 1000 entries)
-            if len(self.reminder_log) > 1000:
-                self.reminder_log = self.reminder_log[-1000:]
-            
-            with open(self.reminder_log_file, 'w') as f:
-                json.dump(self.reminder_log, f, indent=2)
+    def save_data(self, categories: Optional[List[str]] = None):
+        """
+        Save reminders to storage
+        
+        Args:
+            categories: Subset of 'med', 'water' and 'log' to write; all when None
+        """
+        if categories is None:
+            categories = list(self._dirty)
+        
+        with self._save_lock:
+            try:
+                # Save medication reminders
+                if 'med' in categories:
+                    med_data = {k: reminder_to_dict(v) for k, v in self.medication_reminders.items()}
+                    self._write_category('med', self.med_reminders_file, med_data)
+                
+                # Save water reminders
+                if 'water' in categories:
+                    water_data = {k: reminder_to_dict(v) for k, v in self.water_reminders.items()}
+                    self._write_category('water', self.water_reminders_file, water_data)
+                
+                # Append new log entries
+                if 'log' in categories:
+                    self._append_log_entries()
+                
+                for category in categories:
+                    self._dirty[category] = False
+                
+                logger.debug("Reminder data saved: %s", ", ".join(categories))
+                
+            except Exception as e:
+                logger.error(f"Error saving reminder data: {e}")
+
+    @property
+    def reminder_log(self) -> List[Dict]:
+        """Most recent reminder actions, read from disk on first access"""
+        with self._save_lock:
+            if self._reminder_log is None:
+                entries = self.read_log_file() if self.reminder_log_file.exists() else []
+                # Entries logged before the first read are not on disk yet
+                self._reminder_log = (entries + self._pending_log)[-MAX_LOG_ENTRIES:]
+            return self._reminder_log
+
+    @reminder_log.setter
+    def reminder_log(self, entries: List[Dict]):
+        self._reminder_log = entries
+
+    def read_log_file(self) -> List[Dict]:
+        """Read the most recent entries from the JSON Lines reminder log"""
+        entries = []
+        with open(self.reminder_log_file, 'rb') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    entries.append(loads_json(line))
+                except ValueError:
+                    # A torn final line from an interrupted append
+                    logger.warning("Skipping corrupt reminder log entry")
+        
+        self._log_file_entries = len(entries)
+        return entries[-MAX_LOG_ENTRIES:]
+
+    def migrate_legacy_log(self):
+        """Convert the old JSON array reminder log to JSON Lines"""
+        entries = loads_json(self.legacy_reminder_log_file.read_bytes())
+        write_atomic(self.reminder_log_file, b''.join(dumps_json_line(e) for e in entries))
+        self.legacy_reminder_log_file.unlink()
+        logger.info(f"Migrated {len(entries)} reminder log entries to {self.reminder_log_file.name}")
+
+    def _append_log_entries(self):
+        """Append pending log entries, compacting the file when it grows too large"""
+        # Keep last MAX_LOG_ENTRIES entries in memory
+        if self._reminder_log is not None and len(self._reminder_log) > MAX_LOG_ENTRIES:
+            self._reminder_log = self._reminder_log[-MAX_LOG_ENTRIES:]
+        
+        if self._log_file_entries is None:
+            # Counting lines is much cheaper than parsing the log
+            self._log_file_entries = (
+                self.reminder_log_file.read_bytes().count(b'\n')
+                if self.reminder_log_file.exists() else 0
+            )
+        
+        if self._log_file_entries + len(self._pending_log) > 2 * MAX_LOG_ENTRIES:
+            write_atomic(
+                self.reminder_log_file,
+                b''.join(dumps_json_line(entry) for entry in self.reminder_log)
+            )
+            self._log_file_entries = len(self.reminder_log)
+        elif self._pending_log:
+            with open(self.reminder_log_file, 'ab') as f:
+                f.write(b''.join(dumps_json_line(entry) for entry in self._pending_log))
+            self._log_file_entries += len(self._pending_log)
+        
+        self._pending_log = []
+
+    def _write_category(self, category: str, path: Path, data):
+        """Atomically write one category, skipping it if nothing changed"""
+        raw = dumps_json(data)
+        raw_hash = hash(raw)
+        if raw_hash == self._saved_hashes[category] and path.exists():
+            return
+        
+        write_atomic(path, raw)
+        self._saved_hashes[category] = raw_hash
+
+    def _mark_dirty(self, *categories: str):
+        """Record unsaved changes and schedule a batched save"""
+        with self._save_lock:
+            for category in categories:
+                self._dirty[category] = True
             
-            logger.info("✅ Reminder data saved successfully")
+            if self._save_timer is None:
+                self._save_timer = threading.Timer(SAVE_DEBOUNCE_SECONDS, self.flush)
+                self._save_timer.daemon = True
+                self._save_timer.start()
+
+    def flush(self):
+        """Write all pending changes to storage immediately"""
+        with self._save_lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
             
-        except Exception as e:
-            logger.error(f"Error saving reminder data: {e}")
+            dirty = [category for category, is_dirty in self._dirty.items() if is_dirty]
+            if dirty:
+                self.save_data(dirty)
 
     def create_medication_reminder_from_prescription(self, entities: List[Dict]) -> List[MedicationReminder]:
         """
@@ -140,6 +428,13 @@ class SmartReminderSystem:
         """
         created_reminders = []
         
+        # Loop invariants: one timestamp and a running id number for the batch
+        now = datetime.now()
+        id_suffix = now.strftime('%Y%m%d_%H%M%S')
+        start_date = now.strftime('%Y-%m-%d')
+        created_at = now.isoformat()
+        id_numbers = itertools.count(len(self.medication_reminders) + 1)
+        
         for entity in entities:
             drug_name = entity.get('drug', '')
             dosage = entity.get('dose', '')
@@ -154,7 +449,7 @@ class SmartReminderSystem:
                 times = ['08:00']  # Default morning dose
             
             # Create reminder
-            reminder_id = f"med_{len(self.medication_reminders) + 1}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            reminder_id = f"med_{next(id_numbers)}_{id_suffix}"
             
             reminder = MedicationReminder(
                 id=reminder_id,
@@ -163,16 +458,21 @@ class SmartReminderSystem:
                 frequency=frequency,
                 times=times,
                 instructions=self.get_medication_instructions(drug_name),
-                start_date=datetime.now().strftime('%Y-%m-%d'),
-                created_at=datetime.now().isoformat()
+                start_date=start_date,
+                created_at=created_at
             )
             
-            self.medication_reminders[reminder_id] = reminder
             created_reminders.append(reminder)
-            
-            logger.info(f"Created reminder for {drug_name}")
         
-        self.save_data()
+        # Mutate under the save lock so a pending background save never sees a half-updated dict
+        with self._save_lock:
+            self.medication_reminders.update((reminder.id, reminder) for reminder in created_reminders)
+            self._rebuild_indexes()
+            
+            # One write for the whole prescription
+            self._mark_dirty('med')
+            self.flush()
+        logger.info("Created %d medication reminders", len(created_reminders))
         return created_reminders
 
     def parse_frequency_to_times(self, frequency: str) -> List[str]:
@@ -182,52 +482,18 @@ class SmartReminderSystem:
         
         freq_lower = frequency.lower()
         
-        # Common frequency mappings
-        if 'once' in freq_lower or 'daily' in freq_lower and 'twice' not in freq_lower:
-            return ['08:00']
-        elif 'twice' in freq_lower or 'bid' in freq_lower:
-            return ['08:00', '20:00']
-        elif 'three times' in freq_lower or 'tid' in freq_lower:
-            return ['08:00', '14:00', '20:00']
-        elif 'four times' in freq_lower or 'qid' in freq_lower:
-            return ['08:00', '12:00', '16:00', '20:00']
-        elif 'every 4 hours' in freq_lower or 'q4h' in freq_lower:
-            return ['06:00', '10:00', '14:00', '18:00', '22:00']
-        elif 'every 6 hours' in freq_lower or 'q6h' in freq_lower:
-            return ['06:00', '12:00', '18:00', '24:00']
-        elif 'every 8 hours' in freq_lower or 'q8h' in freq_lower:
-            return ['08:00', '16:00', '24:00']
-        elif 'bedtime' in freq_lower or 'night' in freq_lower:
-            return ['22:00']
-        elif 'morning' in freq_lower:
-            return ['08:00']
-        else:
-            return ['08:00']  # Default
+        for pattern, times in FREQUENCY_TIME_PATTERNS:
+            if pattern.search(freq_lower):
+                return list(times)
+        
+        return ['08:00']  # Default
 
     def get_medication_instructions(self, drug_name: str) -> str:
         """Get specific instructions for common medications"""
-        drug_lower = drug_name.lower()
-        
-        # Common medication instructions
-        instructions_map = {
-            'aspirin': 'Take with food to prevent stomach upset',
-            'ibuprofen': 'Take with food or milk',
-            'paracetamol': 'Can be taken with or without food',
-            'acetaminophen': 'Can be taken with or without food',
-            'metformin': 'Take with meals to reduce stomach upset',
-            'lisinopril': 'Take at the same time each day',
-            'atorvastatin': 'Take at bedtime for best effect',
-            'simvastatin': 'Take in the evening with dinner',
-            'warfarin': 'Take at the same time daily, avoid alcohol',
-            'digoxin': 'Take on empty stomach, check pulse',
-            'furosemide': 'Take in morning to avoid nighttime urination',
-            'amlodipine': 'Take at the same time each day'
-        }
-        
         # Find matching instruction
-        for drug, instruction in instructions_map.items():
-            if drug in drug_lower:
-                return instruction
+        match = MEDICATION_INSTRUCTIONS_PATTERN.search(drug_name.lower())
+        if match:
+            return MEDICATION_INSTRUCTIONS[match.group()]
         
         return 'Take as prescribed by your doctor'
 
@@ -242,51 +508,102 @@ class SmartReminderSystem:
             interval_minutes=interval_minutes
         )
         
-        self.water_reminders[reminder_id] = reminder
-        self.save_data()
+        with self._save_lock:
+            self.water_reminders[reminder_id] = reminder
+            self._mark_dirty('water')
+            self.flush()
         
-        logger.info(f"Created water reminder: {target_glasses} glasses every {interval_minutes} minutes")
+        logger.debug("Created water reminder: %d glasses every %d minutes", target_glasses, interval_minutes)
         return reminder
 
+    def _rebuild_indexes(self):
+        """Rebuild the due-time index and adherence totals from the reminders"""
+        self._rebuild_time_index()
+        self._recompute_totals()
+        self._indexed_reminder_count = len(self.medication_reminders)
+
+    def _ensure_indexes(self):
+        """Rebuild derived state if reminders were added directly to the dict"""
+        if self._indexed_reminder_count != len(self.medication_reminders):
+            self._rebuild_indexes()
+
+    def _recompute_totals(self):
+        """Aggregate adherence totals over all medication reminders"""
+        active_reminders = [r for r in self.medication_reminders.values() if r.is_active]
+        self._totals = {
+            'taken': sum(r.total_doses_taken for r in self.medication_reminders.values()),
+            'prescribed': sum(r.total_doses_prescribed for r in self.medication_reminders.values()),
+            'active_count': len(active_reminders),
+            'active_streak_sum': sum(r.streak_days for r in active_reminders)
+        }
+
+    def _rebuild_time_index(self):
+        """Index the times of all medication reminders by minute of day"""
+        index = []
+        for reminder_id, reminder in self.medication_reminders.items():
+            time_slots = reminder.time_slots
+            if time_slots is None:
+                time_slots = reminder.compute_time_slots()
+            
+            for reminder_minutes, time_str in time_slots:
+                index.append((reminder_minutes, reminder_id, time_str))
+        
+        index.sort()
+        self._med_time_index = index
+
     def get_current_reminders(self) -> Dict[str, List]:
         """Get current due reminders"""
         current_time = datetime.now()
-        current_date = current_time.strftime('%Y-%m-%d')
-        current_time_str = current_time.strftime('%H:%M')
         
         due_medications = []
         due_water = []
         
-        # Check medication reminders
-        for reminder in self.medication_reminders.values():
-            if not reminder.is_active:
-                continue
+        self._ensure_indexes()
+        
+        # Check medication reminders due within the window around now
+        now_minutes = current_time.hour * 60 + current_time.minute + current_time.second / 60
+        index = self._med_time_index
+        
+        for start, end in minute_ranges(now_minutes - DUE_WINDOW_MINUTES, now_minutes + DUE_WINDOW_MINUTES):
+            lo = bisect_left(index, (start,))
+            hi = bisect_left(index, (end + 1,))
             
-            for time_str in reminder.times:
-                # Check if this time is due (within 30 minutes)
-                reminder_time = datetime.strptime(f"{current_date} {time_str}", '%Y-%m-%d %H:%M')
-                time_diff = (current_time - reminder_time).total_seconds() / 60
+            for reminder_minutes, reminder_id, time_str in index[lo:hi]:
+                reminder = self.medication_reminders.get(reminder_id)
+                if reminder is None or not reminder.is_active:
+                    continue
+                
+                # Signed distance on the 24h clock, so 23:50 is 20 minutes before 00:10
+                time_diff = now_minutes - reminder_minutes
+                if time_diff > MINUTES_PER_DAY / 2:
+                    time_diff -= MINUTES_PER_DAY
+                elif time_diff < -MINUTES_PER_DAY / 2:
+                    time_diff += MINUTES_PER_DAY
                 
-                if -30 <= time_diff <= 30:  # Due within 30 minutes
-                    due_medications.append({
-                        'reminder': reminder,
-                        'due_time': time_str,
-                        'status': 'due' if time_diff >= 0 else 'upcoming'
-                    })
+                due_medications.append({
+                    'reminder': reminder,
+                    'due_time': time_str,
+                    'status': 'due' if time_diff >= 0 else 'upcoming'
+                })
         
         # Check water reminders
         for reminder in self.water_reminders.values():
             if not reminder.is_active:
                 continue
             
+            last_reminder_time = None
             if reminder.last_reminder:
-                last_reminder_time = datetime.fromisoformat(reminder.last_reminder)
+                last_reminder_time = reminder.last_reminder_dt
+                if last_reminder_time is None:
+                    last_reminder_time = reminder.last_reminder_dt = parse_timestamp(reminder.last_reminder)
+            
+            if last_reminder_time is not None:
                 minutes_since_last = (current_time - last_reminder_time).total_seconds() / 60
                 
                 if minutes_since_last >= reminder.interval_minutes:
                     due_water.append(reminder)
             else:
-                # First reminder of the day
+                # First reminder of the day, or no usable time of the last one
                 due_water.append(reminder)
         
         return {
@@ -296,47 +613,79 @@ class SmartReminderSystem:
 
     def mark_medication_taken(self, reminder_id: str, taken_time: Optional[str] = None) -> bool:
         """Mark a medication as taken"""
-        if reminder_id not in self.medication_reminders:
-            return False
-        
-        reminder = self.medication_reminders[reminder_id]
-        taken_time = taken_time or datetime.now().isoformat()
-        
-        # Update reminder
-        reminder.last_taken = taken_time
-        reminder.total_doses_taken += 1
-        
-        # Update streak
-        today = datetime.now().date()
-        if reminder.last_taken:
-            last_taken_date = datetime.fromisoformat(reminder.last_taken).date()
-            if last_taken_date == today:
-                reminder.streak_days += 1
-            elif last_taken_date != today - timedelta(days=1):
-                reminder.streak_days = 1  # Reset streak
-        else:
-            reminder.streak_days = 1
-        
-        # Log the action
-        self.log_reminder_action(reminder_id, ReminderType.MEDICATION, ReminderStatus.COMPLETED, taken_time)
-        
-        self.save_data()
-        return True
+        with self._save_lock:
+            if reminder_id not in self.medication_reminders:
+                return False
+            
+            self._ensure_indexes()
+            
+            reminder = self.medication_reminders[reminder_id]
+            now = datetime.now()
+            previous_streak = reminder.streak_days
+            
+            # Update reminder
+            if taken_time:
+                reminder.last_taken_dt = datetime.fromisoformat(taken_time)
+            else:
+                taken_time = now.isoformat()
+                reminder.last_taken_dt = now
+            reminder.last_taken = taken_time
+            reminder.total_doses_taken += 1
+            
+            # Update streak
+            today = now.date()
+            if reminder.last_taken:
+                last_taken_date = reminder.last_taken_dt.date()
+                if last_taken_date == today:
+                    reminder.streak_days += 1
+                elif last_taken_date != today - timedelta(days=1):
+                    reminder.streak_days = 1  # Reset streak
+            else:
+                reminder.streak_days = 1
+            
+            # Keep adherence totals current
+            self._totals['taken'] += 1
+            if reminder.is_active:
+                self._totals['active_streak_sum'] += reminder.streak_days - previous_streak
+            
+            # Log the action
+            self.log_reminder_action(reminder_id, ReminderType.MEDICATION, ReminderStatus.COMPLETED, taken_time)
+            
+            self._mark_dirty('med')
+            return True
+
+    def deactivate_reminder(self, reminder_id: str) -> bool:
+        """Stop a medication reminder without deleting its history"""
+        with self._save_lock:
+            reminder = self.medication_reminders.get(reminder_id)
+            if reminder is None:
+                return False
+            
+            if reminder.is_active:
+                self._ensure_indexes()
+                reminder.is_active = False
+                self._totals['active_count'] -= 1
+                self._totals['active_streak_sum'] -= reminder.streak_days
+                self._mark_dirty('med')
+            
+            return True
 
     def mark_water_consumed(self, reminder_id: str, glasses: int = 1) -> bool:
         """Mark water consumption"""
-        if reminder_id not in self.water_reminders:
-            return False
-        
-        reminder = self.water_reminders[reminder_id]
-        reminder.current_intake += glasses
-        reminder.last_reminder = datetime.now().isoformat()
-        
-        # Log the action
-        self.log_reminder_action(reminder_id, ReminderType.WATER, ReminderStatus.COMPLETED)
-        
-        self.save_data()
-        return True
+        with self._save_lock:
+            if reminder_id not in self.water_reminders:
+                return False
+            
+            reminder = self.water_reminders[reminder_id]
+            reminder.current_intake += glasses
+            reminder.last_reminder_dt = datetime.now()
+            reminder.last_reminder = reminder.last_reminder_dt.isoformat()
+            
+            # Log the action
+            self.log_reminder_action(reminder_id, ReminderType.WATER, ReminderStatus.COMPLETED, reminder.last_reminder)
+            
+            self._mark_dirty('water')
+            return True
 
     def log_reminder_action(self, reminder_id: str, reminder_type: ReminderType, status: ReminderStatus, timestamp: str = None):
         """Log reminder actions for analytics"""
@@ -347,37 +696,34 @@ class SmartReminderSystem:
             'timestamp': timestamp or datetime.now().isoformat()
         }
         
-        self.reminder_log.append(log_entry)
+        with self._save_lock:
+            if self._reminder_log is not None:
+                self._reminder_log.append(log_entry)
+            self._pending_log.append(log_entry)
+            self._mark_dirty('log')
 
     def get_adherence_stats(self, days: int = 7) -> Dict:
         """Get medication adherence statistics"""
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=days)
+        self._ensure_indexes()
+        totals = self._totals
         
         stats = {
             'total_medications': len(self.medication_reminders),
-            'active_medications': len([r for r in self.medication_reminders.values() if r.is_active]),
+            'active_medications': totals['active_count'],
             'adherence_rate': 0.0,
             'streak_days': 0,
-            'total_doses_taken': 0,
-            'total_doses_prescribed': 0,
+            'total_doses_taken': totals['taken'],
+            'total_doses_prescribed': totals['prescribed'],
             'water_goal_achievement': 0.0
         }
         
         # Calculate medication adherence
-        total_taken = sum(r.total_doses_taken for r in self.medication_reminders.values())
-        total_prescribed = sum(r.total_doses_prescribed for r in self.medication_reminders.values())
-        
-        if total_prescribed > 0:
-            stats['adherence_rate'] = (total_taken / total_prescribed) * 100
-        
-        stats['total_doses_taken'] = total_taken
-        stats['total_doses_prescribed'] = total_prescribed
+        if totals['prescribed'] > 0:
+            stats['adherence_rate'] = (totals['taken'] / totals['prescribed']) * 100
         
         # Calculate average streak
-        active_reminders = [r for r in self.medication_reminders.values() if r.is_active]
-        if active_reminders:
-            stats['streak_days'] = sum(r.streak_days for r in active_reminders) / len(active_reminders)
+        if totals['active_count']:
+            stats['streak_days'] = totals['active_streak_sum'] / totals['active_count']
         
         return stats
 
@@ -454,23 +800,32 @@ class SmartReminderSystem:
         
         return report
 
+# Shared reminder system, so convenience callers do not reload data from disk
+_reminder_system: Optional[SmartReminderSystem] = None
+_reminder_system_lock = threading.Lock()
+
+def get_reminder_system() -> SmartReminderSystem:
+    """Get the process-wide reminder system, creating it on first use"""
+    global _reminder_system
+    if _reminder_system is None:
+        with _reminder_system_lock:
+            if _reminder_system is None:
+                _reminder_system = SmartReminderSystem()
+    return _reminder_system
+
 # Convenience functions
 def create_reminders_from_prescription(entities: List[Dict]) -> List[MedicationReminder]:
     """Create medication reminders from prescription entities"""
-    system = SmartReminderSystem()
-    return system.create_medication_reminder_from_prescription(entities)
+    return get_reminder_system().create_medication_reminder_from_prescription(entities)
 
 def get_current_notifications() -> List[Dict]:
     """Get current reminder notifications"""
-    system = SmartReminderSystem()
-    return system.get_reminder_notifications()
+    return get_reminder_system().get_reminder_notifications()
 
 def mark_dose_taken(reminder_id: str) -> bool:
     """Mark a medication dose as taken"""
-    system = SmartReminderSystem()
-    return system.mark_medication_taken(reminder_id)
+    return get_reminder_system().mark_medication_taken(reminder_id)
 
 def mark_water_drunk(reminder_id: str, glasses: int = 1) -> bool:
     """Mark water consumption"""
-    system = SmartReminderSystem()
-    return system.mark_water_consumed(reminder_id, glasses)
\ No newline at end of file
+    return get_reminder_system().mark_water_consumed(reminder_id, glasses)
\ No newline at end of file
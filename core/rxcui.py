@@ -1,14 +1,164 @@
+import os
+import re
 import requests
+import sqlite3
 import time
+import random
 import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from typing import Optional, List, Dict, Any
-from functools import lru_cache
+from functools import lru_cache, wraps
+from pathlib import Path
 import json
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Logging is configured by the application
 logger = logging.getLogger(__name__)
 
+# Throttling responses handled by the adaptive retry loop in _make_request
+THROTTLE_STATUS_CODES = (429, 503)
+MAX_REQUEST_ATTEMPTS = 3
+MAX_RETRY_AFTER_SECONDS = 10.0
+
+# ijson prefix of the concepts inside a related.json response
+RELATED_CONCEPTS_PREFIX = 'relatedGroup.conceptGroup.item.conceptProperties.item'
+
+# Strength such as "325 MG" or "0.5 ml" inside a concept name
+_STRENGTH_RE = re.compile(r'\d+(?:\.\d+)?\s*(?:mg|mcg|g|ml)\b', re.IGNORECASE)
+
+def extract_strengths(names: List[str]) -> List[str]:
+    """
+    Unique first strength of each concept name, in order of appearance
+    """
+    return list(dict.fromkeys(m.group() for m in map(_STRENGTH_RE.search, names) if m))
+
+# Persistent lookup cache shared across process restarts
+RXNORM_CACHE_PATH = Path(os.getenv('RXNORM_CACHE_PATH', 'data/cache/rxnorm_cache.sqlite'))
+RXNORM_CACHE_TTL_SECONDS = 7 * 24 * 3600
+
+class _DiskCache:
+    """
+    Minimal sqlite-backed key/value store with per-entry expiry
+    """
+    
+    def __init__(self, path: Path):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._disabled = False
+        self._lock = threading.Lock()
+    
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        """Open the database on first use; disable the cache if that fails"""
+        if self._conn is None and not self._disabled:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                conn = sqlite3.connect(str(self.path), check_same_thread=False)
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS cache "
+                    "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL)"
+                )
+                conn.commit()
+                self._conn = conn
+            except (OSError, sqlite3.Error) as e:
+                logger.warning(f"RxNorm disk cache disabled: {e}")
+                self._disabled = True
+        return self._conn
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return default
+            try:
+                row = conn.execute("SELECT value, expires FROM cache WHERE key = ?", (key,)).fetchone()
+            except sqlite3.Error as e:
+                logger.warning(f"RxNorm disk cache read failed: {e}")
+                return default
+        
+        if row is None or row[1] < time.time():
+            return default
+        return json.loads(row[0])
+    
+    def set(self, key: str, value: Any, expire: float):
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)",
+                    (key, json.dumps(value), time.time() + expire)
+                )
+                conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"RxNorm disk cache write failed: {e}")
+
+_disk_cache = _DiskCache(RXNORM_CACHE_PATH)
+_MISS = object()
+
+def disk_memoize(ttl: float = RXNORM_CACHE_TTL_SECONDS):
+    """
+    Persist RxNormAPI method results in the disk cache, keyed by method name and arguments
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(self, *args):
+            key = f"{func.__name__}:{args!r}"
+            value = _disk_cache.get(key, _MISS)
+            if value is not _MISS:
+                return value
+            
+            value = func(self, *args)
+            # Empty results may come from a failed request, so only persist hits
+            if value:
+                _disk_cache.set(key, value, ttl)
+            return value
+        return wrapper
+    return decorator
+
+def single_flight(func):
+    """
+    Let concurrent identical RxNormAPI calls wait on one in-flight lookup
+    """
+    @wraps(func)
+    def wrapper(self, *args):
+        key = (func.__name__, args)
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = Future()
+                self._inflight[key] = future
+        
+        if not is_leader:
+            return future.result()
+        
+        try:
+            result = func(self, *args)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                del self._inflight[key]
+    return wrapper
+
 class RxNormAPI:
     """
     RxNorm API client for drug information lookup
@@ -21,38 +171,148 @@ class RxNormAPI:
             'User-Agent': 'AI-Prescription-Verifier/1.0',
             'Accept': 'application/json'
         })
+        # Keep pooled HTTPS connections alive and retry transient failures
+        # (429/503 are left to the adaptive backoff in _make_request)
+        self.session.mount('https://', HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=32,
+            max_retries=Retry(total=3, backoff_factor=0.2,
+                              status_forcelist=[500, 502, 504])
+        ))
+        
+        # Rate limiting (token bucket: bursts up to capacity, 10 req/s sustained)
+        self._tb_cap = 10.0
+        self._tb_rate = 10.0
+        self._tb_tokens = self._tb_cap
+        self._tb_last = time.monotonic()
+        self._tb_lock = threading.Lock()
+        
+        # Adaptive backoff: throttling lowers the rate, successes restore it
+        self._tb_max_rate = self._tb_rate
+        self._tb_min_rate = 0.5
+        self._tb_decrease_factor = 0.7
+        self._tb_increase_step = 0.5
+        
+        # Retry budget: retries cost a token, successes refill a fraction
+        self._retry_cap = 5.0
+        self._retry_tokens = self._retry_cap
+        self._retry_refill = 0.1
         
-        # Rate limiting
-        self.last_request_time = 0
-        self.min_request_interval = 0.1  # 100ms between requests
+        # Lookups currently in flight, shared by concurrent identical calls
+        self._inflight: Dict[tuple, Future] = {}
+        self._inflight_lock = threading.Lock()
     
-    def _make_request(self, endpoint: str, params: dict = None) -> Optional[dict]:
+    def _acquire_token(self):
         """
-        Make a rate-limited request to RxNorm API
+        Take one token from the rate-limit bucket, sleeping if it is empty
         """
-        # Rate limiting
-        current_time = time.time()
-        time_since_last_request = current_time - self.last_request_time
-        if time_since_last_request < self.min_request_interval:
-            time.sleep(self.min_request_interval - time_since_last_request)
+        with self._tb_lock:
+            now = time.monotonic()
+            self._tb_tokens = min(self._tb_cap, self._tb_tokens + (now - self._tb_last) * self._tb_rate)
+            self._tb_last = now
+            # Reserve the token now so concurrent callers queue up behind us
+            wait = (1 - self._tb_tokens) / self._tb_rate if self._tb_tokens < 1 else 0
+            self._tb_tokens -= 1
         
+        if wait > 0:
+            time.sleep(wait)
+    
+    def _decrease_rate(self):
+        """Slow down after the endpoint throttled us"""
+        with self._tb_lock:
+            self._tb_rate = max(self._tb_min_rate, self._tb_rate * self._tb_decrease_factor)
+    
+    def _record_success(self):
+        """Recover request rate and retry budget after a successful call"""
+        with self._tb_lock:
+            self._tb_rate = min(self._tb_max_rate, self._tb_rate + self._tb_increase_step)
+            self._retry_tokens = min(self._retry_cap, self._retry_tokens + self._retry_refill)
+    
+    def _take_retry_token(self) -> bool:
+        """Spend one retry from the budget, or fail fast when it is exhausted"""
+        with self._tb_lock:
+            if self._retry_tokens < 1:
+                return False
+            self._retry_tokens -= 1
+            return True
+    
+    @staticmethod
+    def _retry_delay(response: requests.Response, attempt: int) -> float:
+        """Honour Retry-After when present, otherwise exponential backoff with jitter"""
+        retry_after = response.headers.get('Retry-After')
+        if retry_after:
+            try:
+                return min(MAX_RETRY_AFTER_SECONDS, max(0.0, float(retry_after)))
+            except ValueError:
+                pass
+        return random.uniform(0, 2 ** attempt * 0.1)
+    
+    def _make_request(self, endpoint: str, params: dict = None, stream: bool = False):
+        """
+        Make a rate-limited request to RxNorm API
+        
+        Returns the decoded JSON, or the open response for the caller to
+        parse incrementally when stream is True.
+        """
         url = f"{self.base_url}/{endpoint}"
         
-        try:
-            response = self.session.get(url, params=params, timeout=10)
-            self.last_request_time = time.time()
-            
-            response.raise_for_status()
-            return response.json()
+        for attempt in range(MAX_REQUEST_ATTEMPTS):
+            # Rate limiting
+            self._acquire_token()
             
-        except requests.exceptions.RequestException as e:
-            logger.error(f"RxNorm API request failed: {e}")
-            return None
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse RxNorm API response: {e}")
-            return None
+            try:
+                response = self.session.get(url, params=params, timeout=10, stream=stream)
+                
+                if response.status_code in THROTTLE_STATUS_CODES:
+                    response.close()
+                    self._decrease_rate()
+                    if attempt + 1 < MAX_REQUEST_ATTEMPTS and self._take_retry_token():
+                        time.sleep(self._retry_delay(response, attempt))
+                        continue
+                    logger.error(f"RxNorm API throttled request to {endpoint} (HTTP {response.status_code})")
+                    return None
+                
+                response.raise_for_status()
+                if stream:
+                    self._record_success()
+                    return response
+                
+                # orjson.JSONDecodeError subclasses json.JSONDecodeError
+                data = orjson.loads(response.content) if ORJSON_AVAILABLE else response.json()
+                self._record_success()
+                return data
+                
+            except requests.exceptions.RequestException as e:
+                logger.error(f"RxNorm API request failed: {e}")
+                return None
+            except json.JSONDecodeError as e:
+                logger.error(f"Failed to parse RxNorm API response: {e}")
+                return None
+        
+        return None
+
+    def _iter_related_concepts(self, endpoint: str, params: dict = None):
+        """
+        Yield conceptProperties entries of a related.json response,
+        parsing the body as it downloads when ijson is available
+        """
+        if IJSON_AVAILABLE:
+            response = self._make_request(endpoint, params, stream=True)
+            if response is None:
+                return
+            with response:
+                response.raw.decode_content = True
+                yield from ijson.items(response.raw, RELATED_CONCEPTS_PREFIX)
+            return
+        
+        data = self._make_request(endpoint, params)
+        if data and 'relatedGroup' in data and 'conceptGroup' in data['relatedGroup']:
+            for group in data['relatedGroup']['conceptGroup']:
+                yield from group.get('conceptProperties', [])
 
     @lru_cache(maxsize=1000)
+    @single_flight
+    @disk_memoize()
     def get_rxcui(self, name: str) -> Optional[str]:
         """
         Get RxCUI for a drug name
@@ -70,7 +330,7 @@ class RxNormAPI:
             if data and 'idGroup' in data and 'rxnormId' in data['idGroup']:
                 rxcuis = data['idGroup']['rxnormId']
                 if rxcuis:
-                    logger.info(f"Found RxCUI for '{name}': {rxcuis[0]}")
+                    logger.debug("Found RxCUI for '%s': %s", name, rxcuis[0])
                     return rxcuis[0]
             
             # Try approximate match
@@ -83,10 +343,10 @@ class RxNormAPI:
                     first_candidate = candidates[0] if isinstance(candidates, list) else candidates
                     rxcui = first_candidate.get('rxcui')
                     if rxcui:
-                        logger.info(f"Found approximate RxCUI for '{name}': {rxcui}")
+                        logger.debug("Found approximate RxCUI for '%s': %s", name, rxcui)
                         return rxcui
             
-            logger.warning(f"No RxCUI found for drug: {name}")
+            logger.warning("No RxCUI found for drug: %s", name)
             return None
             
         except Exception as e:
@@ -94,6 +354,8 @@ class RxNormAPI:
             return None
 
     @lru_cache(maxsize=500)
+    @single_flight
+    @disk_memoize()
     def get_scds(self, rxcui: str) -> List[Dict[str, str]]:
         """
         Get Semantic Clinical Drugs (SCDs) for an RxCUI
@@ -102,31 +364,24 @@ class RxNormAPI:
             return []
         
         try:
-            data = self._make_request(f"rxcui/{rxcui}/related.json", {"tty": "SCD"})
+            scds = []
+            for concept in self._iter_related_concepts(f"rxcui/{rxcui}/related.json", {"tty": "SCD"}):
+                scds.append({
+                    'rxcui': concept.get('rxcui', ''),
+                    'name': concept.get('name', ''),
+                    'tty': concept.get('tty', '')
+                })
             
-            if data and 'relatedGroup' in data and 'conceptGroup' in data['relatedGroup']:
-                concept_groups = data['relatedGroup']['conceptGroup']
-                
-                scds = []
-                for group in concept_groups:
-                    if 'conceptProperties' in group:
-                        for concept in group['conceptProperties']:
-                            scds.append({
-                                'rxcui': concept.get('rxcui', ''),
-                                'name': concept.get('name', ''),
-                                'tty': concept.get('tty', '')
-                            })
-                
-                logger.info(f"Found {len(scds)} SCDs for RxCUI {rxcui}")
-                return scds
-            
-            return []
+            logger.debug("Found %d SCDs for RxCUI %s", len(scds), rxcui)
+            return scds
             
         except Exception as e:
             logger.error(f"Error getting SCDs for RxCUI {rxcui}: {e}")
             return []
 
     @lru_cache(maxsize=500)
+    @single_flight
+    @disk_memoize()
     def get_ingredient(self, rxcui: str) -> Optional[str]:
         """
         Get ingredient RxCUI for a drug
@@ -145,7 +400,7 @@ class RxNormAPI:
                         for concept in group['conceptProperties']:
                             if concept.get('tty') == 'IN':
                                 ingredient_rxcui = concept.get('rxcui')
-                                logger.info(f"Found ingredient RxCUI for {rxcui}: {ingredient_rxcui}")
+                                logger.debug("Found ingredient RxCUI for %s: %s", rxcui, ingredient_rxcui)
                                 return ingredient_rxcui
             
             return None
@@ -155,6 +410,8 @@ class RxNormAPI:
             return None
 
     @lru_cache(maxsize=500)
+    @single_flight
+    @disk_memoize()
     def get_brands(self, ingredient_rxcui: str) -> List[str]:
         """
         Get brand alternatives for an ingredient
@@ -163,24 +420,22 @@ class RxNormAPI:
             return []
         
         try:
-            data = self._make_request(f"rxcui/{ingredient_rxcui}/related.json", {"tty": "SBD"})
-            
-            if data and 'relatedGroup' in data and 'conceptGroup' in data['relatedGroup']:
-                concept_groups = data['relatedGroup']['conceptGroup']
-                
-                brands = []
-                for group in concept_groups:
-                    if 'conceptProperties' in group:
-                        for concept in group['conceptProperties']:
-                            if concept.get('tty') == 'SBD':
-                                brand_name = concept.get('name', '')
-                                if brand_name and brand_name not in brands:
-                                    brands.append(brand_name)
-                
-                logger.info(f"Found {len(brands)} brand alternatives for ingredient {ingredient_rxcui}")
-                return brands[:10]  # Limit to top 10 brands
+            brands = []
+            seen = set()
+            concepts = self._iter_related_concepts(f"rxcui/{ingredient_rxcui}/related.json", {"tty": "SBD"})
+            for concept in concepts:
+                if concept.get('tty') == 'SBD':
+                    brand_name = concept.get('name', '')
+                    if brand_name and brand_name not in seen:
+                        seen.add(brand_name)
+                        brands.append(brand_name)
+                        # Limit to top 10 brands; stop reading the response there
+                        if len(brands) >= 10:
+                            concepts.close()
+                            break
             
-            return []
+            logger.debug("Found %d brand alternatives for ingredient %s", len(brands), ingredient_rxcui)
+            return brands
             
         except Exception as e:
             logger.error(f"Error getting brands for ingredient {ingredient_rxcui}: {e}")
@@ -197,51 +452,104 @@ class RxNormAPI:
             # Get related concepts including different strengths
             data = self._make_request(f"rxcui/{rxcui}/related.json")
             
-            strengths = []
+            names = []
             if data and 'relatedGroup' in data and 'conceptGroup' in data['relatedGroup']:
-                concept_groups = data['relatedGroup']['conceptGroup']
-                
-                for group in concept_groups:
-                    if 'conceptProperties' in group:
-                        for concept in group['conceptProperties']:
-                            name = concept.get('name', '')
-                            # Extract strength information from name
-                            import re
-                            strength_match = re.search(r'\d+(?:\.\d+)?\s*(?:mg|mcg|g|ml)\b', name, re.IGNORECASE)
-                            if strength_match:
-                                strength = strength_match.group()
-                                if strength not in strengths:
-                                    strengths.append(strength)
+                for group in data['relatedGroup']['conceptGroup']:
+                    for concept in group.get('conceptProperties', []):
+                        names.append(concept.get('name', ''))
             
-            return strengths
+            # Extract strength information from names
+            return extract_strengths(names)
             
         except Exception as e:
             logger.error(f"Error getting strengths for RxCUI {rxcui}: {e}")
             return []
 
-# Convenience functions for easy use
-@lru_cache(maxsize=1000)
+    @lru_cache(maxsize=500)
+    @single_flight
+    @disk_memoize()
+    def get_drug_info_combined(self, name: str) -> Optional[Dict[str, List]]:
+        """
+        Get SCDs, brand names and strengths for a drug name from a single /drugs call
+        """
+        if not name or not name.strip():
+            return None
+        
+        try:
+            data = self._make_request("drugs.json", {"name": name.strip().lower()})
+            
+            if not data or 'conceptGroup' not in data.get('drugGroup', {}):
+                return None
+            
+            scds = []
+            brands = []
+            seen_brands = set()
+            names = []
+            for group in data['drugGroup']['conceptGroup']:
+                for concept in group.get('conceptProperties', []):
+                    tty = concept.get('tty')
+                    concept_name = concept.get('name', '')
+                    
+                    if tty == 'SCD':
+                        scds.append({
+                            'rxcui': concept.get('rxcui', ''),
+                            'name': concept_name,
+                            'tty': tty
+                        })
+                    elif tty == 'SBD':
+                        if concept_name and concept_name not in seen_brands:
+                            seen_brands.add(concept_name)
+                            brands.append(concept_name)
+                    else:
+                        continue
+                    names.append(concept_name)
+            
+            logger.debug("Found %d SCDs and %d brands for '%s' via /drugs", len(scds), len(brands), name)
+            return {
+                'scds': scds,
+                'brands': brands[:10],  # Limit to top 10 brands
+                'strengths': extract_strengths(names)
+            }
+            
+        except Exception as e:
+            logger.error(f"Error getting combined drug info for '{name}': {e}")
+            return None
+
+# Shared client so all lookups reuse one pooled session
+_API: Optional[RxNormAPI] = None
+_api_lock = threading.Lock()
+
+# Worker threads for overlapping independent lookups in get_drug_info
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='rxnorm')
+
+def _api() -> RxNormAPI:
+    """Get the shared RxNormAPI instance"""
+    global _API
+    if _API is None:
+        with _api_lock:
+            if _API is None:
+                _API = RxNormAPI()
+    return _API
+
+# Convenience functions for easy use (cached by the shared client's methods)
 def get_rxcui(name: str) -> Optional[str]:
     """Get RxCUI for a drug name"""
-    api = RxNormAPI()
+    api = _api()
     return api.get_rxcui(name)
 
-@lru_cache(maxsize=500)
 def get_scds(rxcui: str) -> List[Dict[str, str]]:
     """Get SCDs for an RxCUI"""
-    api = RxNormAPI()
+    api = _api()
     return api.get_scds(rxcui)
 
-@lru_cache(maxsize=500)
 def get_ingredient(rxcui: str) -> Optional[str]:
     """Get ingredient RxCUI"""
-    api = RxNormAPI()
+    api = _api()
     return api.get_ingredient(rxcui)
 
-@lru_cache(maxsize=500)
 def get_brands(ingredient_rxcui: str) -> List[str]:
     """Get brand alternatives"""
-    api = RxNormAPI()
+    api = _api()
     return api.get_brands(ingredient_rxcui)
 
 def get_drug_info(drug_name: str) -> Dict[str, Any]:
@@ -258,7 +566,7 @@ def get_drug_info(drug_name: str) -> Dict[str, Any]:
     }
     
     try:
-        api = RxNormAPI()
+        api = _api()
         
         # Get RxCUI
         rxcui = api.get_rxcui(drug_name)
@@ -267,19 +575,27 @@ def get_drug_info(drug_name: str) -> Dict[str, Any]:
         
         result['rxcui'] = rxcui
         
-        # Get SCDs
-        result['scds'] = api.get_scds(rxcui)
+        # One /drugs call covers SCDs, brands and strengths; fetch the ingredient alongside it
+        f_combined = _executor.submit(api.get_drug_info_combined, drug_name)
+        f_ingredient = _executor.submit(api.get_ingredient, rxcui)
         
-        # Get ingredient
-        ingredient_rxcui = api.get_ingredient(rxcui)
+        ingredient_rxcui = f_ingredient.result()
         if ingredient_rxcui:
             result['ingredient_rxcui'] = ingredient_rxcui
-            
-            # Get brand alternatives
+        
+        combined = f_combined.result()
+        if combined:
+            result.update(combined)
+            return result
+        
+        # Fall back to per-endpoint lookups when /drugs has nothing for this name
+        f_scds = _executor.submit(api.get_scds, rxcui)
+        f_strengths = _executor.submit(api.get_drug_strengths, rxcui)
+        if ingredient_rxcui:
             result['brands'] = api.get_brands(ingredient_rxcui)
         
-        # Get available strengths
-        result['strengths'] = api.get_drug_strengths(rxcui)
+        result['scds'] = f_scds.result()
+        result['strengths'] = f_strengths.result()
         
         return result
         
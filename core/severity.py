@@ -1,13 +1,71 @@
+import os
+import hashlib
 import logging
-from typing import Literal, Dict
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Literal, Dict, List, Optional, Tuple
 from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification
 import torch
 import re
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
+# Optional: int8 ONNX Runtime inference for faster CPU classification
+try:
+    from optimum.onnxruntime import ORTModelForSequenceClassification, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    OPTIMUM_AVAILABLE = True
+except ImportError:
+    OPTIMUM_AVAILABLE = False
+
+# Logging is configured by the application
 logger = logging.getLogger(__name__)
 
+# Where the exported and quantized severity model is kept between runs
+SEVERITY_ONNX_DIR = Path(os.getenv('SEVERITY_ONNX_DIR', 'data/cache/models/distilbert-sst2-int8'))
+QUANTIZED_MODEL_FILE = 'model_quantized.onnx'
+
+# Texts shorter than this carry too little sentiment to adjust the rules
+MIN_TRANSFORMER_TEXT_LENGTH = 20
+
+# Interaction descriptions are often canned monograph text, so cache verdicts
+SEVERITY_CACHE_SIZE = 4096
+
+# Severity cues sit near the start of a description; ~128 tokens covers 256 chars
+MAX_CLASSIFICATION_CHARS = 256
+MAX_CLASSIFICATION_TOKENS = 128
+
+# Patterns that strongly indicate a severe interaction
+CRITICAL_PATTERNS = [
+    r'\b(?:do not|never|avoid)\b.*\b(?:combine|use together|concurrent)\b',
+    r'\bcontraindicated\b',
+    r'\b(?:severe|serious|life-threatening)\b.*\b(?:reaction|effect|outcome)\b',
+    r'\b(?:death|fatal|mortality)\b',
+    r'\bemergency\b.*\brequired\b'
+]
+
+# Patterns that suggest monitoring or dose changes
+WARNING_PATTERNS = [
+    r'\bmonitor\b.*\b(?:closely|carefully|frequently)\b',
+    r'\b(?:adjust|reduce|modify)\b.*\bdose\b',
+    r'\bmay (?:increase|decrease|affect)\b',
+    r'\bcaution\b.*\brequired\b'
+]
+
+def _union_pattern(patterns: list) -> re.Pattern:
+    """
+    Combine patterns into one regex whose match names report which pattern hit.
+    The lookahead tries every position, so overlapping matches of different
+    patterns are all found (the patterns start with distinct words).
+    """
+    return re.compile('(?=' + '|'.join(f'(?P<p{i}>{p})' for i, p in enumerate(patterns)) + ')')
+
+CRITICAL_PATTERN = _union_pattern(CRITICAL_PATTERNS)
+WARNING_PATTERN = _union_pattern(WARNING_PATTERNS)
+
+def _normalize_keywords(keywords: list) -> Tuple[str, ...]:
+    """Lowercase and dedupe keywords once, keeping their order"""
+    return tuple(dict.fromkeys(keyword.lower() for keyword in keywords))
+
 class SeverityClassifier:
     """
     Classify severity of drug interactions using transformer models and rules
@@ -18,34 +76,66 @@ class SeverityClassifier:
         self.classifier = None
         self.load_model()
         
+        # LRU of severities keyed by a digest of the text
+        self._severity_cache: "OrderedDict[bytes, str]" = OrderedDict()
+        self._severity_cache_lock = threading.Lock()
+        
         # Severity keywords
-        self.high_severity_keywords = [
+        self.high_severity_keywords = _normalize_keywords([
             'contraindicated', 'dangerous', 'fatal', 'death', 'life-threatening',
             'severe', 'serious', 'emergency', 'hospitalization', 'toxic',
             'poisoning', 'overdose', 'respiratory depression', 'cardiac arrest',
             'serotonin syndrome', 'bleeding', 'hemorrhage', 'stroke', 'seizure'
-        ]
+        ])
         
-        self.medium_severity_keywords = [
+        self.medium_severity_keywords = _normalize_keywords([
             'monitor', 'caution', 'adjust', 'reduce', 'increase', 'modify',
             'careful', 'watch', 'observe', 'check', 'avoid', 'consider',
             'may increase', 'may decrease', 'potential', 'risk', 'interaction'
-        ]
+        ])
         
-        self.low_severity_keywords = [
+        self.low_severity_keywords = _normalize_keywords([
             'minor', 'minimal', 'slight', 'theoretical', 'unlikely',
             'possible', 'rare', 'uncommon', 'mild', 'moderate interaction'
-        ]
+        ])
+        
+        # Single-pass keyword matcher; the lookahead reports overlapping matches
+        # such as 'increase' inside 'may increase'
+        self.keyword_levels = {}
+        for level, keywords in (('low', self.low_severity_keywords),
+                                ('medium', self.medium_severity_keywords),
+                                ('high', self.high_severity_keywords)):
+            for keyword in keywords:
+                self.keyword_levels[keyword] = level
+        alternation = '|'.join(re.escape(k) for k in sorted(self.keyword_levels, key=len, reverse=True))
+        self.keyword_pattern = re.compile(f'(?=({alternation}))')
 
     def load_model(self):
         """Load the sentiment classification model"""
+        if self.classifier is not None:
+            return
+        
+        # On CPU prefer the int8 ONNX model when optimum is installed
+        if OPTIMUM_AVAILABLE and not torch.cuda.is_available():
+            self.classifier = self.load_quantized_model()
+            if self.classifier is not None:
+                return
+        
         try:
             logger.info("Loading sentiment classification model for severity...")
+            tokenizer = AutoTokenizer.from_pretrained(self.model_name, use_fast=True)
             self.classifier = pipeline(
                 "sentiment-analysis",
                 model=self.model_name,
+                tokenizer=tokenizer,
                 device=0 if torch.cuda.is_available() else -1
             )
+            
+            # Half precision roughly doubles GPU throughput for this binary classifier
+            if torch.cuda.is_available():
+                self.classifier.model.half()
+            self.classifier.model.eval()
+            
             logger.info("✅ Severity classification model loaded successfully")
             
         except Exception as e:
@@ -53,9 +143,33 @@ class SeverityClassifier:
             logger.info("Falling back to rule-based severity classification")
             self.classifier = None
 
-    def classify_with_transformer(self, text: str) -> Dict:
+    def load_quantized_model(self):
+        """
+        Load the int8 ONNX version of the model, exporting and quantizing it on first use
+        """
+        try:
+            if not (SEVERITY_ONNX_DIR / QUANTIZED_MODEL_FILE).exists():
+                logger.info("Exporting severity model to ONNX with int8 quantization...")
+                ort_model = ORTModelForSequenceClassification.from_pretrained(self.model_name, export=True)
+                quantizer = ORTQuantizer.from_pretrained(ort_model)
+                qconfig = AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+                quantizer.quantize(save_dir=SEVERITY_ONNX_DIR, quantization_config=qconfig)
+                AutoTokenizer.from_pretrained(self.model_name).save_pretrained(SEVERITY_ONNX_DIR)
+            
+            model = ORTModelForSequenceClassification.from_pretrained(SEVERITY_ONNX_DIR, file_name=QUANTIZED_MODEL_FILE)
+            tokenizer = AutoTokenizer.from_pretrained(SEVERITY_ONNX_DIR, use_fast=True)
+            classifier = pipeline("sentiment-analysis", model=model, tokenizer=tokenizer)
+            logger.info("✅ Quantized severity classification model loaded successfully")
+            return classifier
+            
+        except Exception as e:
+            logger.warning(f"Failed to load quantized ONNX model: {e}")
+            return None
+
+    def classify_with_transformer(self, text: str) -> Optional[Dict]:
         """
-        Use transformer model to get sentiment as proxy for severity
+        Use transformer model to get sentiment as proxy for severity,
+        or None if the model failed on this text
         """
         if not self.classifier or not text:
             return {"label": "NEUTRAL", "score": 0.5}
@@ -64,12 +178,13 @@ class SeverityClassifier:
             # Clean text for better classification
             clean_text = self.clean_text_for_classification(text)
             
-            result = self.classifier(clean_text)
+            with torch.inference_mode():
+                result = self.classifier(clean_text, truncation=True, max_length=MAX_CLASSIFICATION_TOKENS)
             return result[0] if isinstance(result, list) else result
             
         except Exception as e:
             logger.error(f"Transformer severity classification failed: {e}")
-            return {"label": "NEUTRAL", "score": 0.5}
+            return None
 
     def clean_text_for_classification(self, text: str) -> str:
         """
@@ -82,9 +197,8 @@ class SeverityClassifier:
         text = ' '.join(text.split())
         
         # Limit length for transformer
-        max_length = 512
-        if len(text) > max_length:
-            text = text[:max_length]
+        if len(text) > MAX_CLASSIFICATION_CHARS:
+            text = text[:MAX_CLASSIFICATION_CHARS]
         
         return text
 
@@ -92,54 +206,72 @@ class SeverityClassifier:
         """
         Rule-based severity classification using keywords
         """
+        return self.classify_with_rules_confidence(text)[0]
+
+    def classify_with_rules_confidence(self, text: str) -> Tuple[str, bool]:
+        """
+        Rule-based severity plus whether the verdict is strong enough
+        that the transformer should not adjust it
+        """
         if not text:
-            return "medium"
+            return "medium", False
         
         text_lower = text.lower()
         
-        # Count keyword matches
-        high_count = sum(1 for keyword in self.high_severity_keywords if keyword in text_lower)
-        medium_count = sum(1 for keyword in self.medium_severity_keywords if keyword in text_lower)
-        low_count = sum(1 for keyword in self.low_severity_keywords if keyword in text_lower)
-        
-        # Additional pattern matching
-        critical_patterns = [
-            r'\b(?:do not|never|avoid)\b.*\b(?:combine|use together|concurrent)\b',
-            r'\bcontraindicated\b',
-            r'\b(?:severe|serious|life-threatening)\b.*\b(?:reaction|effect|outcome)\b',
-            r'\b(?:death|fatal|mortality)\b',
-            r'\bemergency\b.*\brequired\b'
-        ]
+        # Count distinct keyword matches per level
+        counts = {'low': 0, 'medium': 0, 'high': 0}
+        for keyword in {m.group(1) for m in self.keyword_pattern.finditer(text_lower)}:
+            counts[self.keyword_levels[keyword]] += 1
+        high_count = counts['high']
+        medium_count = counts['medium']
+        low_count = counts['low']
         
-        for pattern in critical_patterns:
-            if re.search(pattern, text_lower):
-                high_count += 2
+        # Additional pattern matching (each distinct pattern counts once)
+        high_count += 2 * len({m.lastgroup for m in CRITICAL_PATTERN.finditer(text_lower)})
         
         # Warning patterns
-        warning_patterns = [
-            r'\bmonitor\b.*\b(?:closely|carefully|frequently)\b',
-            r'\b(?:adjust|reduce|modify)\b.*\bdose\b',
-            r'\bmay (?:increase|decrease|affect)\b',
-            r'\bcaution\b.*\brequired\b'
-        ]
-        
-        for pattern in warning_patterns:
-            if re.search(pattern, text_lower):
-                medium_count += 1
+        medium_count += len({m.lastgroup for m in WARNING_PATTERN.finditer(text_lower)})
         
         # Determine severity based on counts
         if high_count >= 2:
-            return "high"
+            return "high", True
         elif high_count == 1 and medium_count >= 1:
-            return "high"
+            return "high", False
         elif low_count >= 2 and high_count == 0:
-            return "low"
+            return "low", True
         elif medium_count >= 2:
-            return "medium"
+            return "medium", False
         elif high_count >= 1:
-            return "high"
+            return "high", False
         else:
-            return "medium"  # Default to medium when unclear
+            return "medium", False  # Default to medium when unclear
+
+    def needs_transformer(self, text: str, strong_rule: bool) -> bool:
+        """
+        Whether the transformer could still change the rule-based verdict
+        """
+        return bool(self.classifier) and not strong_rule and len(text.strip()) >= MIN_TRANSFORMER_TEXT_LENGTH
+
+    @staticmethod
+    def _text_key(text: str) -> bytes:
+        """Fixed-size cache key for a text"""
+        return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+
+    def _get_cached_severity(self, key: bytes) -> Optional[str]:
+        """Return the cached severity for a key, or None"""
+        with self._severity_cache_lock:
+            severity = self._severity_cache.get(key)
+            if severity is not None:
+                self._severity_cache.move_to_end(key)
+            return severity
+
+    def _cache_severity(self, key: bytes, severity: str):
+        """Store a severity, evicting the least recently used entry"""
+        with self._severity_cache_lock:
+            self._severity_cache[key] = severity
+            self._severity_cache.move_to_end(key)
+            while len(self._severity_cache) > SEVERITY_CACHE_SIZE:
+                self._severity_cache.popitem(last=False)
 
     def classify_severity(self, text: str) -> Literal["low", "medium", "high"]:
         """
@@ -148,39 +280,113 @@ class SeverityClassifier:
         if not text or not text.strip():
             return "medium"
         
+        key = self._text_key(text)
+        cached = self._get_cached_severity(key)
+        if cached is not None:
+            return cached
+        
         try:
             # Get rule-based classification
-            rule_severity = self.classify_with_rules(text)
-            
-            # Get transformer-based sentiment
-            transformer_result = self.classify_with_transformer(text)
+            rule_severity, strong_rule = self.classify_with_rules_confidence(text)
             
-            # Combine results
-            if self.classifier:
-                sentiment = transformer_result.get("label", "NEUTRAL")
-                confidence = transformer_result.get("score", 0.5)
-                
-                # Adjust rule-based severity using sentiment
-                if sentiment == "NEGATIVE" and confidence > 0.8:
-                    # High confidence negative sentiment suggests higher severity
-                    if rule_severity == "low":
-                        rule_severity = "medium"
-                    elif rule_severity == "medium":
-                        rule_severity = "high"
-                elif sentiment == "POSITIVE" and confidence > 0.8:
-                    # High confidence positive sentiment suggests lower severity
-                    if rule_severity == "high":
-                        rule_severity = "medium"
-                    elif rule_severity == "medium":
-                        rule_severity = "low"
+            # Get transformer-based sentiment only when it can still matter
+            if self.needs_transformer(text, strong_rule):
+                transformer_result = self.classify_with_transformer(text)
+                if transformer_result is None:
+                    # Don't cache a verdict that missed its transformer adjustment
+                    return rule_severity
+                rule_severity = self.adjust_with_sentiment(rule_severity, transformer_result)
             
-            logger.info(f"Classified severity as '{rule_severity}' for text snippet")
+            self._cache_severity(key, rule_severity)
+            logger.debug("Classified severity as '%s' for text snippet", rule_severity)
             return rule_severity
             
         except Exception as e:
             logger.error(f"Severity classification failed: {e}")
             return "medium"  # Safe default
 
+    def adjust_with_sentiment(self, rule_severity: str, transformer_result: Dict) -> Literal["low", "medium", "high"]:
+        """
+        Adjust rule-based severity using transformer sentiment
+        """
+        sentiment = transformer_result.get("label", "NEUTRAL")
+        confidence = transformer_result.get("score", 0.5)
+        
+        if sentiment == "NEGATIVE" and confidence > 0.8:
+            # High confidence negative sentiment suggests higher severity
+            if rule_severity == "low":
+                return "medium"
+            elif rule_severity == "medium":
+                return "high"
+        elif sentiment == "POSITIVE" and confidence > 0.8:
+            # High confidence positive sentiment suggests lower severity
+            if rule_severity == "high":
+                return "medium"
+            elif rule_severity == "medium":
+                return "low"
+        
+        return rule_severity
+
+    def classify_severity_batch(self, texts: List[str]) -> List[str]:
+        """
+        Classify several texts, running the transformer over them in batches
+        """
+        severities = []
+        indices = []
+        keys = {}
+        for i, text in enumerate(texts):
+            if not text or not text.strip():
+                severities.append("medium")
+                continue
+            
+            key = self._text_key(text)
+            cached = self._get_cached_severity(key)
+            if cached is not None:
+                severities.append(cached)
+                continue
+            keys[i] = key
+            
+            severity, strong_rule = self.classify_with_rules_confidence(text)
+            severities.append(severity)
+            # Only ambiguous texts go through the model
+            if self.needs_transformer(text, strong_rule):
+                indices.append(i)
+        
+        if indices:
+            try:
+                clean_texts = [self.clean_text_for_classification(texts[i]) for i in indices]
+                # The pipeline pads each batch only to its longest text
+                with torch.inference_mode():
+                    results = self.classifier(clean_texts, batch_size=32, truncation=True,
+                                              max_length=MAX_CLASSIFICATION_TOKENS)
+            except Exception as e:
+                logger.error(f"Batched transformer severity classification failed: {e}")
+                # Don't cache verdicts that missed their transformer adjustment
+                for i in indices:
+                    del keys[i]
+            else:
+                for i, result in zip(indices, results):
+                    severities[i] = self.adjust_with_sentiment(severities[i], result)
+                logger.debug("Classified severity for %d interactions in batch", len(indices))
+        
+        for i, key in keys.items():
+            self._cache_severity(key, severities[i])
+        
+        return severities
+
+# Shared classifier so the model is loaded once per process
+_severity_classifier: Optional[SeverityClassifier] = None
+_severity_classifier_lock = threading.Lock()
+
+def get_severity_classifier() -> SeverityClassifier:
+    """Get the shared SeverityClassifier instance"""
+    global _severity_classifier
+    if _severity_classifier is None:
+        with _severity_classifier_lock:
+            if _severity_classifier is None:
+                _severity_classifier = SeverityClassifier()
+    return _severity_classifier
+
 def classify_severity(text: str) -> Literal["low", "medium", "high"]:
     """
     Convenience function for severity classification
@@ -191,22 +397,28 @@ def classify_severity(text: str) -> Literal["low", "medium", "high"]:
     Returns:
         Severity level: "low", "medium", or "high"
     """
-    classifier = SeverityClassifier()
+    classifier = get_severity_classifier()
     return classifier.classify_severity(text)
 
 def classify_multiple_interactions(interactions: list) -> list:
     """
     Classify severity for multiple interactions efficiently
     """
-    classifier = SeverityClassifier()
+    classifier = get_severity_classifier()
     
+    to_classify = []
+    texts = []
     for interaction in interactions:
         if 'description' in interaction or 'interaction_text' in interaction:
-            text = interaction.get('description') or interaction.get('interaction_text', '')
-            interaction['severity'] = classifier.classify_severity(text)
+            to_classify.append(interaction)
+            texts.append(interaction.get('description') or interaction.get('interaction_text', ''))
         else:
             interaction['severity'] = 'medium'
     
+    # One batched model pass for all descriptions
+    for interaction, severity in zip(to_classify, classifier.classify_severity_batch(texts)):
+        interaction['severity'] = severity
+    
     return interactions
 
 def get_severity_color(severity: str) -> str:
@@ -1,23 +1,157 @@
+import os
+import hashlib
 import logging
-from typing import Optional
-from transformers import pipeline, AutoTokenizer, AutoModelForSeq2SeqLM
+import contextlib
+import copy
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional, Tuple
+from transformers import pipeline, AutoTokenizer, AutoModelForSeq2SeqLM, GenerationConfig
 import torch
 import re
 
+# Optional: ONNX Runtime inference for faster CPU summarization
+try:
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM
+    OPTIMUM_AVAILABLE = True
+except ImportError:
+    OPTIMUM_AVAILABLE = False
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Texts per forward pass when summarizing several at once
+SUMMARY_BATCH_SIZE = 8
+
+# Beam search width; 2 beams is much faster than the checkpoint default of 4
+# and loses little on short advice texts
+SUMMARY_NUM_BEAMS = 2
+
+# Summaries are capped relative to input length so short advice needs fewer decoder steps
+SUMMARY_LENGTH_RATIO = 0.6
+MIN_SUMMARY_MAX_LENGTH = 25
+
+# Texts of at most this many words are already short enough to show as-is
+SHORT_TEXT_WORDS = 15
+
+# The same interaction descriptions recur across reports, so cache summaries
+SUMMARY_CACHE_SIZE = 2048
+
+# The distilled model is much faster and good enough for short advice texts;
+# set USE_LARGE_BART=true to use BART-large instead
+DEFAULT_SUMMARY_MODEL = "sshleifer/distilbart-cnn-6-6"
+LARGE_SUMMARY_MODEL = "facebook/bart-large-cnn"
+FALLBACK_SUMMARY_MODEL = "sshleifer/distilbart-cnn-12-6"
+
+# Where exported ONNX summarization models are kept between runs
+SUMMARIZER_ONNX_DIR = Path(os.getenv('SUMMARIZER_ONNX_DIR', 'data/cache/models/summarizer-onnx'))
+
+# Opt-in int8 dynamic quantization of the PyTorch model's Linear layers on CPU
+QUANTIZE_SUMMARIZER = os.getenv('QUANTIZE_SUMMARIZER', 'false').lower() in ('1', 'true', 'yes')
+
+# Opt-in torch.compile of the PyTorch model (slower start, faster inference)
+COMPILE_SUMMARIZER = os.getenv('COMPILE_SUMMARIZER', 'false').lower() in ('1', 'true', 'yes')
+
+# Number of app workers expected to summarize at the same time on this machine;
+# CPU cores are split between them to avoid oversubscription
+SUMMARIZER_CONCURRENCY = max(1, int(os.getenv('SUMMARIZER_CONCURRENCY', '1')))
+
+_cpu_threads_configured = False
+
+def configure_cpu_threads():
+    """Size PyTorch's CPU thread pools for summarization (applied once per process)"""
+    global _cpu_threads_configured
+    if _cpu_threads_configured:
+        return
+    _cpu_threads_configured = True
+    
+    torch.set_num_threads(max(1, (os.cpu_count() or 1) // SUMMARIZER_CONCURRENCY))
+    try:
+        # Generation has no independent ops to run in parallel
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # Can only be set before PyTorch starts any parallel work
+        pass
+
+# Medical jargon and the simpler terms used in patient-facing summaries
+MEDICAL_TERM_REPLACEMENTS = {
+    'contraindicated': 'should not be used together',
+    'concurrent use': 'using at the same time',
+    'monitor closely': 'watch carefully',
+    'adjust dose': 'change the amount',
+    'pharmacokinetic': 'how the body processes the drug',
+    'pharmacodynamic': 'how the drug affects the body',
+    'bioavailability': 'how much drug enters the bloodstream',
+    'metabolism': 'breakdown of the drug',
+    'hepatic': 'liver',
+    'renal': 'kidney',
+    'cardiovascular': 'heart and blood vessels',
+    'gastrointestinal': 'stomach and intestines'
+}
+
+# All jargon terms in one alternation so each text is scanned once
+MEDICAL_TERM_PATTERN = re.compile(
+    r'\b(?:' + '|'.join(re.escape(term) for term in MEDICAL_TERM_REPLACEMENTS) + r')\b',
+    re.IGNORECASE
+)
+REDUNDANT_PHRASE_PATTERN = re.compile(
+    r'\b(?:the patient should|patients should|it is recommended that)\b', re.IGNORECASE
+)
+REPEATED_PERIOD_PATTERN = re.compile(r'\.+')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+# Sentences matching these are preferred by the rule-based summarizer
+PRIORITY_PATTERNS = [
+    r'(?:contraindicated|should not be used together)',
+    r'(?:monitor|watch).*(?:closely|carefully)',
+    r'(?:adjust|change).*dose',
+    r'(?:risk|danger) of.*',
+    r'may (?:cause|increase|decrease).*',
+    r'(?:avoid|do not).*'
+]
+PRIORITY_PATTERN = re.compile('|'.join(f'(?:{pattern})' for pattern in PRIORITY_PATTERNS), re.IGNORECASE)
+
+# The rule-based summary keeps at most this many sentences
+MAX_SUMMARY_SENTENCES = 2
+
+def _replace_medical_term(match: re.Match) -> str:
+    return MEDICAL_TERM_REPLACEMENTS[match.group(0).lower()]
+
+def cpu_supports_bf16() -> bool:
+    """Whether the CPU has native bfloat16 matmul support (AVX512-BF16 / AMX)"""
+    # The probe was renamed across PyTorch releases
+    probe = (getattr(torch.cpu, '_is_avx512_bf16_supported', None)
+             or getattr(torch.cpu, '_is_cpu_support_avx512_bf16', None))
+    try:
+        return bool(probe and probe())
+    except Exception:
+        return False
+
 class MedicalSummarizer:
     """
-    Generate patient-friendly summaries of medical advice using BART
+    Generate patient-friendly summaries of medical advice using (Distil)BART
     """
     
-    def __init__(self):
-        self.model_name = "facebook/bart-large-cnn"
+    def __init__(self, model_name: Optional[str] = None):
+        if model_name is None:
+            use_large = os.getenv('USE_LARGE_BART', 'false').lower() in ('1', 'true', 'yes')
+            model_name = LARGE_SUMMARY_MODEL if use_large else DEFAULT_SUMMARY_MODEL
+        self.model_name = model_name
         self.summarizer = None
         self.tokenizer = None
-        self.load_model()
+        self.generation_config = None
+        # bfloat16 autocast for the PyTorch model on capable CPUs
+        self.use_bf16 = False
+        
+        # The model is loaded on first use so rule-based callers never pay for it
+        self._load_attempted = False
+        self._load_lock = threading.Lock()
+        
+        # LRU of finished summaries keyed by a digest of the text and the advice type
+        self._summary_cache: "OrderedDict[Tuple[bytes, str], str]" = OrderedDict()
+        self._summary_cache_lock = threading.Lock()
         
         # Templates for different types of advice
         self.templates = {
@@ -26,34 +160,195 @@ class MedicalSummarizer:
             'general': "Medical advice: {summary}"
         }
 
+    def _ensure_loaded(self) -> bool:
+        """Load the model on first use; returns whether a model is available"""
+        if not self._load_attempted:
+            with self._load_lock:
+                if not self._load_attempted:
+                    self.load_model()
+                    self._load_attempted = True
+        return self.summarizer is not None
+
     def load_model(self):
         """Load the BART summarization model"""
+        if self.summarizer is not None:
+            return
+        
+        # On CPU prefer the ONNX Runtime export when optimum is installed
+        if OPTIMUM_AVAILABLE and not torch.cuda.is_available():
+            self.summarizer = self.load_onnx_model()
+            if self.summarizer is not None:
+                self.prepare_generation()
+                return
+        
         try:
-            logger.info("Loading BART summarization model...")
+            logger.info(f"Loading {self.model_name} summarization model...")
+            
+            if not torch.cuda.is_available():
+                configure_cpu_threads()
             
-            # Load with smaller model if BART-large fails
+            # Load with another DistilBART checkpoint if the configured model fails
             try:
                 self.summarizer = pipeline(
                     "summarization",
                     model=self.model_name,
                     device=0 if torch.cuda.is_available() else -1
                 )
-                logger.info("✅ BART-large model loaded successfully")
+                logger.info(f"✅ {self.model_name} model loaded successfully")
             except:
+                if self.model_name == FALLBACK_SUMMARY_MODEL:
+                    raise
                 # Fallback to smaller model
                 logger.info("Falling back to distilbart-cnn model...")
                 self.summarizer = pipeline(
                     "summarization",
-                    model="sshleifer/distilbart-cnn-12-6",
+                    model=FALLBACK_SUMMARY_MODEL,
                     device=0 if torch.cuda.is_available() else -1
                 )
+                self.model_name = FALLBACK_SUMMARY_MODEL
                 logger.info("✅ DistilBART model loaded successfully")
+            
+            # Half precision uses the GPU's tensor cores; TF32 covers any remaining FP32 matmuls
+            if torch.cuda.is_available():
+                self.summarizer.model.half()
+                torch.backends.cuda.matmul.allow_tf32 = True
+            self.summarizer.model.eval()
+            
+            if QUANTIZE_SUMMARIZER:
+                self.quantize_model()
+            elif not torch.cuda.is_available() and cpu_supports_bf16():
+                self.use_bf16 = True
+                logger.info("Using bfloat16 autocast for CPU summarization")
+            
+            if COMPILE_SUMMARIZER:
+                self.compile_model()
+            
+            self.prepare_generation()
                 
         except Exception as e:
             logger.warning(f"Failed to load summarization model: {e}")
             logger.info("Falling back to rule-based summarization")
             self.summarizer = None
 
+    def prepare_generation(self):
+        """
+        Keep the tokenizer and a fixed generation config for calling generate() directly
+        """
+        model = self.summarizer.model
+        self.tokenizer = self.summarizer.tokenizer
+        
+        # Start from the checkpoint's summarization settings (length penalty,
+        # no-repeat n-grams) and override only what we tune
+        base_config = getattr(model, 'generation_config', None) or GenerationConfig.from_model_config(model.config)
+        self.generation_config = copy.deepcopy(base_config)
+        self.generation_config.update(
+            min_length=20,
+            num_beams=SUMMARY_NUM_BEAMS,
+            do_sample=False,
+            early_stopping=True,
+            # Reuse decoder key/value states between steps
+            use_cache=True
+        )
+
+    def generate_summaries(self, texts: List[str], max_length: int = 80) -> List[str]:
+        """
+        Run the model's generate() directly on preprocessed texts, in batches
+        """
+        summaries = []
+        for start in range(0, len(texts), SUMMARY_BATCH_SIZE):
+            batch = texts[start:start + SUMMARY_BATCH_SIZE]
+            
+            # Scale the output cap to the longest input in the batch
+            word_count = max(text.count(' ') + 1 for text in batch)
+            batch_max_length = max(MIN_SUMMARY_MAX_LENGTH,
+                                   min(max_length, int(word_count * SUMMARY_LENGTH_RATIO) + 10))
+            
+            inputs = self.tokenizer(
+                batch, return_tensors='pt', padding=True, truncation=True
+            ).to(self.summarizer.device)
+            
+            with self.inference_context():
+                output_ids = self.summarizer.model.generate(
+                    **inputs,
+                    generation_config=self.generation_config,
+                    max_length=batch_max_length,
+                    min_length=min(20, batch_max_length - 5)
+                )
+            
+            summaries.extend(self.tokenizer.batch_decode(output_ids, skip_special_tokens=True))
+        
+        return summaries
+
+    def quantize_model(self):
+        """
+        Convert the model's Linear layers to int8 with dynamic quantization (CPU only)
+        """
+        if torch.cuda.is_available():
+            return
+        
+        engines = [engine for engine in torch.backends.quantized.supported_engines if engine != 'none']
+        if not engines:
+            logger.info("No quantized engine available; keeping FP32 summarization model")
+            return
+        
+        try:
+            self.summarizer.model = torch.quantization.quantize_dynamic(
+                self.summarizer.model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+            logger.info("✅ Summarization model quantized to int8")
+        except Exception as e:
+            logger.warning(f"Dynamic quantization failed, keeping FP32 model: {e}")
+
+    def compile_model(self):
+        """
+        Compile the model's forward pass with torch.compile (PyTorch 2.0+)
+        """
+        if not hasattr(torch, 'compile'):
+            logger.info("torch.compile is unavailable; running the summarizer eagerly")
+            return
+        
+        try:
+            model = self.summarizer.model
+            # Compile forward rather than the module so generate() keeps working;
+            # dynamic shapes avoid recompiling for every input/output length
+            model.forward = torch.compile(model.forward, dynamic=True)
+            logger.info("✅ Summarization model compiled with torch.compile")
+        except Exception as e:
+            logger.warning(f"torch.compile failed, running the summarizer eagerly: {e}")
+
+    @contextlib.contextmanager
+    def inference_context(self):
+        """Inference-mode (and autocast, if enabled) context for running the model"""
+        with torch.inference_mode():
+            if self.use_bf16:
+                with torch.autocast('cpu', dtype=torch.bfloat16):
+                    yield
+            else:
+                yield
+
+    def load_onnx_model(self):
+        """
+        Load the ONNX Runtime version of the model, exporting it on first use
+        """
+        try:
+            onnx_dir = SUMMARIZER_ONNX_DIR / self.model_name.replace('/', '--')
+            
+            if not (onnx_dir / 'config.json').exists():
+                logger.info(f"Exporting {self.model_name} to ONNX...")
+                ort_model = ORTModelForSeq2SeqLM.from_pretrained(self.model_name, export=True)
+                ort_model.save_pretrained(onnx_dir)
+                AutoTokenizer.from_pretrained(self.model_name).save_pretrained(onnx_dir)
+            
+            model = ORTModelForSeq2SeqLM.from_pretrained(onnx_dir, provider="CPUExecutionProvider")
+            tokenizer = AutoTokenizer.from_pretrained(onnx_dir)
+            summarizer = pipeline("summarization", model=model, tokenizer=tokenizer)
+            logger.info(f"✅ ONNX {self.model_name} model loaded successfully")
+            return summarizer
+            
+        except Exception as e:
+            logger.warning(f"Failed to load ONNX summarization model: {e}")
+            return None
+
     def preprocess_text(self, text: str) -> str:
         """
         Preprocess text for better summarization
@@ -62,28 +357,20 @@ class MedicalSummarizer:
             return ""
         
         # Remove excessive whitespace
-        text = ' '.join(text.split())
+        text = WHITESPACE_PATTERN.sub(' ', text).strip()
         
         # Remove medical jargon and replace with simpler terms
-        replacements = {
-            'contraindicated': 'should not be used together',
-            'concurrent use': 'using at the same time',
-            'monitor closely': 'watch carefully',
-            'adjust dose': 'change the amount',
-            'pharmacokinetic': 'how the body processes the drug',
-            'pharmacodynamic': 'how the drug affects the body',
-            'bioavailability': 'how much drug enters the bloodstream',
-            'metabolism': 'breakdown of the drug',
-            'hepatic': 'liver',
-            'renal': 'kidney',
-            'cardiovascular': 'heart and blood vessels',
-            'gastrointestinal': 'stomach and intestines'
-        }
-        
-        for medical_term, simple_term in replacements.items():
-            text = re.sub(rf'\b{medical_term}\b', simple_term, text, flags=re.IGNORECASE)
+        return MEDICAL_TERM_PATTERN.sub(_replace_medical_term, text)
+
+    @staticmethod
+    def _is_short_text(processed_text: str) -> bool:
+        """
+        Whether preprocessed text is too short to be worth summarizing
         
-        return text
+        preprocess_text leaves words separated by single spaces, so counting
+        spaces gives the word count without splitting the text into a list.
+        """
+        return processed_text.count(' ') < SHORT_TEXT_WORDS
 
     def postprocess_summary(self, summary: str) -> str:
         """
@@ -93,7 +380,7 @@ class MedicalSummarizer:
             return ""
         
         # Remove redundant phrases
-        summary = re.sub(r'\b(?:the patient should|patients should|it is recommended that)\b', '', summary, flags=re.IGNORECASE)
+        summary = REDUNDANT_PHRASE_PATTERN.sub('', summary)
         
         # Ensure proper capitalization
         summary = summary.strip()
@@ -105,7 +392,7 @@ class MedicalSummarizer:
             summary += '.'
         
         # Remove duplicate periods
-        summary = re.sub(r'\.+', '.', summary)
+        summary = REPEATED_PERIOD_PATTERN.sub('.', summary)
         
         return summary
 
@@ -113,32 +400,31 @@ class MedicalSummarizer:
         """
         Generate summary using transformer model
         """
-        if not self.summarizer or not text:
+        if not text or not self._ensure_loaded():
+            return ""
+        
+        return self._summarize_processed_with_transformer(self.preprocess_text(text), max_length) or ""
+
+    def _summarize_processed_with_transformer(self, processed_text: str, max_length: int = 80) -> Optional[str]:
+        """
+        Transformer summary of text that has already been through preprocess_text,
+        or None if the model failed on it
+        """
+        if not processed_text or not self._ensure_loaded():
             return ""
         
         try:
-            # Preprocess text
-            processed_text = self.preprocess_text(text)
-            
             # Skip summarization if text is already short
-            if len(processed_text.split()) <= 15:
+            if self._is_short_text(processed_text):
                 return self.postprocess_summary(processed_text)
             
             # Generate summary
-            result = self.summarizer(
-                processed_text,
-                max_length=max_length,
-                min_length=20,
-                do_sample=False,
-                early_stopping=True
-            )
-            
-            summary = result[0]['summary_text'] if result else ""
+            summary = self.generate_summaries([processed_text], max_length)[0]
             return self.postprocess_summary(summary)
             
         except Exception as e:
             logger.error(f"Transformer summarization failed: {e}")
-            return ""
+            return None
 
     def summarize_with_rules(self, text: str, max_words: int = 25) -> str:
         """
@@ -147,31 +433,26 @@ class MedicalSummarizer:
         if not text:
             return ""
         
-        # Preprocess text
-        processed_text = self.preprocess_text(text)
+        return self._summarize_processed_with_rules(self.preprocess_text(text), max_words)
+
+    def _summarize_processed_with_rules(self, processed_text: str, max_words: int = 25) -> str:
+        """
+        Rule-based summary of text that has already been through preprocess_text
+        """
+        if not processed_text:
+            return ""
+        
         sentences = processed_text.split('.')
         
         # Extract key information
         key_phrases = []
         
         # Priority phrases (most important)
-        priority_patterns = [
-            r'(?:contraindicated|should not be used together)',
-            r'(?:monitor|watch).*(?:closely|carefully)',
-            r'(?:adjust|change).*dose',
-            r'(?:risk|danger) of.*',
-            r'may (?:cause|increase|decrease).*',
-            r'(?:avoid|do not).*'
-        ]
-        
         for sentence in sentences:
             sentence = sentence.strip()
-            if not sentence:
-                continue
-                
-            for pattern in priority_patterns:
-                if re.search(pattern, sentence, re.IGNORECASE):
-                    key_phrases.append(sentence)
+            if sentence and PRIORITY_PATTERN.search(sentence):
+                key_phrases.append(sentence)
+                if len(key_phrases) == MAX_SUMMARY_SENTENCES:
                     break
         
         # If no priority phrases found, take first meaningful sentence
@@ -184,7 +465,7 @@ class MedicalSummarizer:
         
         # Combine and limit length
         if key_phrases:
-            summary = '. '.join(key_phrases[:2])  # Max 2 sentences
+            summary = '. '.join(key_phrases)
             words = summary.split()
             if len(words) > max_words:
                 summary = ' '.join(words[:max_words]) + '...'
@@ -207,23 +488,25 @@ class MedicalSummarizer:
         if not text or not text.strip():
             return "No specific advice available."
         
+        key = self._summary_key(text, advice_type)
+        cached = self._get_cached_summary(key)
+        if cached is not None:
+            return cached
+        
         try:
+            # Preprocess once for both the transformer and the rule-based fallback
+            processed_text = self.preprocess_text(text)
+            
             # Try transformer summarization first
             summary = ""
-            if self.summarizer:
-                summary = self.summarize_with_transformer(text)
-            
-            # Fall back to rule-based if transformer fails
-            if not summary or len(summary.strip()) < 10:
-                summary = self.summarize_with_rules(text)
-            
-            # Ensure we have a meaningful summary
-            if not summary or len(summary.strip()) < 5:
-                summary = "Consult your doctor or pharmacist for specific advice."
+            if self._ensure_loaded():
+                summary = self._summarize_processed_with_transformer(processed_text)
             
-            # Apply template if specified
-            if advice_type in self.templates:
-                summary = self.templates[advice_type].format(summary=summary)
+            model_failed = summary is None
+            summary = self.complete_summary(processed_text, summary, advice_type)
+            # Don't pin the rule-based fallback of a transient model error
+            if not model_failed:
+                self._cache_summary(key, summary)
             
             logger.info(f"Generated {advice_type} summary: {len(summary)} characters")
             return summary
@@ -232,6 +515,143 @@ class MedicalSummarizer:
             logger.error(f"Advice summarization failed: {e}")
             return "Please consult your healthcare provider for detailed information."
 
+    @staticmethod
+    def _summary_key(text: str, advice_type: str) -> Tuple[bytes, str]:
+        """Fixed-size cache key for a text and advice type"""
+        return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest(), advice_type
+
+    def _get_cached_summary(self, key: Tuple[bytes, str]) -> Optional[str]:
+        """Return the cached summary for a key, or None"""
+        with self._summary_cache_lock:
+            summary = self._summary_cache.get(key)
+            if summary is not None:
+                self._summary_cache.move_to_end(key)
+            return summary
+
+    def _cache_summary(self, key: Tuple[bytes, str], summary: str):
+        """Store a summary, evicting the least recently used entry"""
+        with self._summary_cache_lock:
+            self._summary_cache[key] = summary
+            self._summary_cache.move_to_end(key)
+            while len(self._summary_cache) > SUMMARY_CACHE_SIZE:
+                self._summary_cache.popitem(last=False)
+
+    def complete_summary(self, processed_text: str, summary: Optional[str], advice_type: str) -> str:
+        """
+        Apply the rule-based fallback and advice template to a transformer summary
+        """
+        # Fall back to rule-based if transformer fails
+        if not summary or len(summary.strip()) < 10:
+            summary = self._summarize_processed_with_rules(processed_text)
+        
+        # Ensure we have a meaningful summary
+        if not summary or len(summary.strip()) < 5:
+            summary = "Consult your doctor or pharmacist for specific advice."
+        
+        # Apply template if specified
+        if advice_type in self.templates:
+            summary = self.templates[advice_type].format(summary=summary)
+        
+        return summary
+
+    def summarize_batch(self, texts: List[str], max_length: int = 80) -> List[str]:
+        """
+        Transformer summaries for several texts using batched pipeline calls
+        
+        Returns an empty string for any text the model could not summarize.
+        """
+        if not self._ensure_loaded():
+            return [""] * len(texts)
+        
+        summaries = self._summarize_processed_batch([self.preprocess_text(text) for text in texts], max_length)
+        return [summary or "" for summary in summaries]
+
+    def _summarize_processed_batch(self, processed_texts: List[str], max_length: int = 80) -> List[Optional[str]]:
+        """
+        summarize_batch for texts that have already been through preprocess_text
+        
+        Texts the model failed on get None instead of an empty string.
+        """
+        summaries = [""] * len(processed_texts)
+        if not self._ensure_loaded():
+            return summaries
+        
+        long_indices = []
+        long_texts = []
+        for i, processed_text in enumerate(processed_texts):
+            if not processed_text:
+                continue
+            
+            # Skip summarization if text is already short
+            if self._is_short_text(processed_text):
+                summaries[i] = self.postprocess_summary(processed_text)
+            else:
+                long_indices.append(i)
+                long_texts.append(processed_text)
+        
+        if not long_texts:
+            return summaries
+        
+        try:
+            results = self.generate_summaries(long_texts, max_length)
+        except Exception as e:
+            logger.error(f"Batched transformer summarization failed: {e}")
+            for i in long_indices:
+                summaries[i] = None
+            return summaries
+        
+        for i, summary in zip(long_indices, results):
+            summaries[i] = self.postprocess_summary(summary)
+        
+        return summaries
+
+    def summarize_advice_batch(self, texts: List[str], advice_type: str = 'general') -> List[str]:
+        """
+        Summarize several advice texts, running the transformer over them in batches
+        """
+        try:
+            results = [None] * len(texts)
+            keys = {}
+            for i, text in enumerate(texts):
+                if not text or not text.strip():
+                    results[i] = "No specific advice available."
+                    continue
+                
+                key = self._summary_key(text, advice_type)
+                cached = self._get_cached_summary(key)
+                if cached is not None:
+                    results[i] = cached
+                else:
+                    keys[i] = key
+            
+            # Only texts missing from the cache go through the model
+            processed_texts = [self.preprocess_text(texts[i]) for i in keys]
+            summaries = self._summarize_processed_batch(processed_texts)
+            for (i, key), processed_text, summary in zip(keys.items(), processed_texts, summaries):
+                results[i] = self.complete_summary(processed_text, summary, advice_type)
+                if summary is not None:
+                    self._cache_summary(key, results[i])
+            
+            logger.info(f"Generated {len(results)} {advice_type} summaries in batch")
+            return results
+            
+        except Exception as e:
+            logger.error(f"Batched advice summarization failed: {e}")
+            return [self.summarize_advice(text, advice_type) for text in texts]
+
+# Shared summarizer so the model is loaded once per process
+_summarizer: Optional[MedicalSummarizer] = None
+_summarizer_lock = threading.Lock()
+
+def get_summarizer() -> MedicalSummarizer:
+    """Get the shared MedicalSummarizer instance"""
+    global _summarizer
+    if _summarizer is None:
+        with _summarizer_lock:
+            if _summarizer is None:
+                _summarizer = MedicalSummarizer()
+    return _summarizer
+
 def summarize_advice(text: str, advice_type: str = 'general') -> str:
     """
     Convenience function for advice summarization
@@ -243,44 +663,49 @@ def summarize_advice(text: str, advice_type: str = 'general') -> str:
     Returns:
         Patient-friendly summary
     """
-    summarizer = MedicalSummarizer()
+    summarizer = get_summarizer()
     return summarizer.summarize_advice(text, advice_type)
 
 def summarize_multiple_interactions(interactions: list) -> list:
     """
     Generate summaries for multiple interactions efficiently
     """
-    summarizer = MedicalSummarizer()
+    summarizer = get_summarizer()
     
+    to_summarize = []
+    texts = []
     for interaction in interactions:
         if 'description' in interaction or 'advice' in interaction:
-            text = interaction.get('description') or interaction.get('advice', '')
-            interaction['summary'] = summarizer.summarize_advice(text, 'interaction')
+            to_summarize.append(interaction)
+            texts.append(interaction.get('description') or interaction.get('advice', ''))
         else:
             interaction['summary'] = 'No specific advice available.'
     
+    # One batched model pass for all descriptions
+    for interaction, summary in zip(to_summarize, summarizer.summarize_advice_batch(texts, 'interaction')):
+        interaction['summary'] = summary
+    
     return interactions
 
 def create_patient_friendly_report(interactions: list, dosage_info: list) -> str:
     """
     Create a comprehensive patient-friendly report
     """
-    summarizer = MedicalSummarizer()
+    summarizer = get_summarizer()
     
     report_sections = []
     
     # Interactions summary
     if interactions:
         report_sections.append("## Drug Interactions Found")
-        for i, interaction in enumerate(interactions, 1):
-            drug_pair = f"{interaction.get('drug_a', 'Drug')} and {interaction.get('drug_b', 'Drug')}"
-            severity = interaction.get('severity', 'unknown')
-            description = interaction.get('description', '')
-            
-            summary = summarizer.summarize_advice(description, 'interaction')
-            
-            report_sections.append(f"{i}. **{drug_pair}** (Severity: {severity.title()})")
-            report_sections.append(f"   {summary}")
+        summaries = summarizer.summarize_advice_batch(
+            [interaction.get('description', '') for interaction in interactions], 'interaction'
+        )
+        report_sections.extend(
+            f"{i}. **{interaction.get('drug_a', 'Drug')} and {interaction.get('drug_b', 'Drug')}** "
+            f"(Severity: {interaction.get('severity', 'unknown').title()})\n   {summary}"
+            for i, (interaction, summary) in enumerate(zip(interactions, summaries), 1)
+        )
     else:
         report_sections.append("## Drug Interactions")
         report_sections.append("No significant drug interactions found.")
@@ -321,7 +746,7 @@ def test_summarization():
     ]
     
     try:
-        summarizer = MedicalSummarizer()
+        summarizer = get_summarizer()
         
         for i, case in enumerate(test_cases, 1):
             original = case['text']
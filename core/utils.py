@@ -1,18 +1,140 @@
 import os
 import csv
 import json
+import shutil
 import logging
+from collections import Counter
 from datetime import datetime
+from io import StringIO
 from pathlib import Path
 from typing import Dict, Any, List, Optional
 import pandas as pd
+import fpdf
 from fpdf import FPDF
 import re
 
+# Optional: faster JSON for config files
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Patterns are compiled once at import rather than on every call
+_CLEAN_RE = re.compile(r'[^\w\s\-\.\,\(\)\[\]\/\%\+\=\:]')
+_PREFIX_SUFFIX_RE = re.compile(r'\b(?:tab|tablet|cap|capsule|inj|injection|syrup|suspension)\b')
+_BRAND_PAREN_RE = re.compile(r'\([^)]*\)')
+# Dose amount/unit and dosage form in one pattern, so a dosage string is scanned once
+_DOSAGE_RE = re.compile(
+    r'(?P<value>\d+(?:\.\d+)?)\s*(?P<unit>mg|mcg|g|ml|units?|iu)\b'
+    r'|\b(?P<form>tablet|cap|capsule|injection|syrup|suspension|drops?)\b',
+    re.IGNORECASE
+)
+
+# Common drug name patterns, combined so the text is scanned once
+DRUG_PATTERNS = [
+    r'\b[A-Z][a-z]+(?:cillin|mycin|prazole|olol|pine|zole|statin|fenac)\b',
+    r'\b(?:aspirin|ibuprofen|acetaminophen|paracetamol|morphine|codeine)\b',
+    r'\b[A-Z][a-z]{3,12}\b(?=\s+\d+\s*mg)'
+]
+DRUG_PATTERN = re.compile('|'.join(f'(?:{pattern})' for pattern in DRUG_PATTERNS), re.IGNORECASE)
+
+# Unicode characters and their ASCII replacements for PDF output
+PDF_UNICODE_REPLACEMENTS = {
+    '✓': '[OK]',
+    '✅': '[OK]',
+    '❌': '[ERROR]',
+    '⚠': '[WARNING]',
+    '⚠️': '[WARNING]',
+    '💊': '[DRUG]',
+    '🔴': '[HIGH]',
+    '🟡': '[MEDIUM]',
+    '🟢': '[LOW]',
+    '→': '->',
+    '←': '<-',
+    '↔': '<->',
+    '•': '-',
+    '·': '-',
+    '“': '"',
+    '”': '"',
+    '‘': "'",
+    '’': "'",
+    '–': '-',
+    '—': '-',
+    '…': '...',
+    '°': ' degrees',
+    '±': '+/-',
+    '×': 'x',
+    '÷': '/',
+    '≤': '<=',
+    '≥': '>=',
+    '≠': '!=',
+    '≈': '~=',
+    '∞': 'infinity',
+    'α': 'alpha',
+    'β': 'beta',
+    'γ': 'gamma',
+    'δ': 'delta',
+    'ε': 'epsilon',
+    'μ': 'micro',
+    'π': 'pi',
+    'σ': 'sigma',
+    'Ω': 'omega'
+}
+
+# Single characters go through one str.translate table; multi-character
+# sequences (emoji with a variation selector) are replaced first with a regex
+_PDF_TRANSLATION = str.maketrans({
+    char: replacement for char, replacement in PDF_UNICODE_REPLACEMENTS.items() if len(char) == 1
+})
+_PDF_MULTICHAR = {
+    chars: replacement for chars, replacement in PDF_UNICODE_REPLACEMENTS.items() if len(chars) > 1
+}
+_PDF_MULTICHAR_RE = re.compile('|'.join(map(re.escape, _PDF_MULTICHAR)))
+
+# Display lookups used per interaction / dosage result in reports
+_SEVERITY_EMOJI = {'low': '🟢', 'medium': '🟡', 'high': '🔴'}
+_STATUS_MAP = {
+    'appropriate': '[OK]',
+    'valid': '[OK]',
+    'too_low': '[LOW]',
+    'too_high': '[HIGH]',
+    'borderline': '[REVIEW]',
+    'unknown': '[?]',
+    'error': '[ERROR]'
+}
+
+# fpdf2 returns the document from output() as a bytearray; legacy PyFPDF
+# needs dest='S' and returns a latin-1 str
+_FPDF_RETURNS_BYTES = int(str(getattr(fpdf, 'FPDF_VERSION', '2')).split('.')[0]) >= 2
+
+# Indent of wrapped descriptions and considerations in the PDF report
+PDF_DETAIL_INDENT_MM = 3
+
+# Uploads are copied to disk in chunks of this size
+UPLOAD_COPY_CHUNK_SIZE = 1024 * 1024
+
+# Dosage statuses that don't count as issues in summary stats
+_OK_DOSE_STATUSES = frozenset({'appropriate', 'unknown'})
+
+# Column keys of the tables in the CSV export
+_ENTITY_COLS = ('drug', 'dose', 'route', 'frequency', 'rxcui')
+_INTERACTION_COLS = ('drug_a', 'drug_b', 'severity', 'description')
+_DOSAGE_COLS = ('drug', 'mentioned_dose', 'dose_status', 'suggested_dose')
+
+def _analysis_timestamp(analysis_results: Dict[str, Any], fmt: Optional[str] = None) -> str:
+    """
+    The results' timestamp, falling back to the current time only when it is missing
+    """
+    if 'timestamp' in analysis_results:
+        return analysis_results['timestamp']
+    now = datetime.now()
+    return now.strftime(fmt) if fmt else now.isoformat()
+
 def ensure_directory_exists(directory_path: str) -> Path:
     """
     Ensure a directory exists, create if it doesn't
@@ -31,10 +153,12 @@ def clean_text(text: str) -> str:
     # Remove extra whitespace
     text = ' '.join(text.split())
     
-    # Remove special characters but keep medical symbols
-    text = re.sub(r'[^\w\s\-\.\,\(\)\[\]\/\%\+\=\:]', '', text)
+    # Remove special characters but keep medical symbols; most input has
+    # none, and the split/join above has already trimmed the ends
+    if _CLEAN_RE.search(text) is None:
+        return text
     
-    return text.strip()
+    return _CLEAN_RE.sub('', text).strip()
 
 def normalize_drug_name(drug_name: str) -> str:
     """
@@ -43,22 +167,15 @@ def normalize_drug_name(drug_name: str) -> str:
     if not drug_name:
         return ""
     
-    # Convert to lowercase and strip whitespace
-    normalized = drug_name.lower().strip()
-    
-    # Remove common prefixes/suffixes
-    prefixes_suffixes = ['tab', 'tablet', 'cap', 'capsule', 'inj', 'injection', 'syrup', 'suspension']
-    
-    for term in prefixes_suffixes:
-        normalized = re.sub(rf'\b{term}\b', '', normalized).strip()
+    # Lowercase and remove common prefixes/suffixes
+    normalized = _PREFIX_SUFFIX_RE.sub('', drug_name.lower())
     
     # Remove brand name indicators in parentheses
-    normalized = re.sub(r'\([^)]*\)', '', normalized).strip()
-    
-    # Remove multiple spaces
-    normalized = ' '.join(normalized.split())
+    if '(' in normalized:
+        normalized = _BRAND_PAREN_RE.sub('', normalized)
     
-    return normalized
+    # Remove extra spaces (this also strips the ends)
+    return ' '.join(normalized.split())
 
 def parse_dosage_units(dosage_string: str) -> Dict[str, Any]:
     """
@@ -74,20 +191,18 @@ def parse_dosage_units(dosage_string: str) -> Dict[str, Any]:
         'form': None
     }
     
-    # Extract numeric value and unit
-    dose_pattern = r'(\d+(?:\.\d+)?)\s*(mg|mcg|g|ml|units?|iu)\b'
-    dose_match = re.search(dose_pattern, dosage_string, re.IGNORECASE)
-    
-    if dose_match:
-        result['value'] = float(dose_match.group(1))
-        result['unit'] = dose_match.group(2).lower()
-    
-    # Extract form (tablet, capsule, etc.)
-    form_pattern = r'\b(tablet|cap|capsule|injection|syrup|suspension|drops?)\b'
-    form_match = re.search(form_pattern, dosage_string, re.IGNORECASE)
-    
-    if form_match:
-        result['form'] = form_match.group(1).lower()
+    # Take the first numeric value with unit and the first form (tablet, capsule, etc.)
+    for match in _DOSAGE_RE.finditer(dosage_string):
+        form = match.group('form')
+        if form:
+            if result['form'] is None:
+                result['form'] = form.lower()
+        elif result['value'] is None:
+            result['value'] = float(match.group('value'))
+            result['unit'] = match.group('unit').lower()
+        
+        if result['value'] is not None and result['form'] is not None:
+            break
     
     return result
 
@@ -128,7 +243,7 @@ def format_drug_interaction(interaction: Dict) -> str:
     severity = interaction.get('severity', 'unknown')
     description = interaction.get('description', 'No description available')
     
-    severity_emoji = {'low': '🟢', 'medium': '🟡', 'high': '🔴'}.get(severity, '⚪')
+    severity_emoji = _SEVERITY_EMOJI.get(severity, '⚪')
     
     return f"{severity_emoji} {drug_a} ↔ {drug_b} ({severity.title()}): {description}"
 
@@ -137,70 +252,49 @@ def save_results_csv(analysis_results: Dict[str, Any]) -> str:
     Save analysis results to CSV format
     """
     try:
-        # Prepare data for CSV
-        csv_data = []
+        # Write rows straight to the output buffer as they are produced
+        output = StringIO()
+        writer = csv.writer(output)
+        writerow = writer.writerow
         
         # Add basic information
-        csv_data.append(['Analysis Date', analysis_results.get('timestamp', datetime.now().isoformat())])
-        csv_data.append(['Patient Age', analysis_results.get('patient_age', 'Unknown')])
-        csv_data.append([''])  # Empty row
+        writerow(('Analysis Date', _analysis_timestamp(analysis_results)))
+        writerow(('Patient Age', analysis_results.get('patient_age', 'Unknown')))
+        writerow(('',))  # Empty row
         
         # Add drug entities
-        csv_data.append(['Drugs Identified'])
-        csv_data.append(['Drug Name', 'Dose', 'Route', 'Frequency', 'RxCUI'])
+        writerow(('Drugs Identified',))
+        writerow(('Drug Name', 'Dose', 'Route', 'Frequency', 'RxCUI'))
         
         entities = analysis_results.get('entities', [])
-        for entity in entities:
-            csv_data.append([
-                entity.get('drug', ''),
-                entity.get('dose', ''),
-                entity.get('route', ''),
-                entity.get('frequency', ''),
-                entity.get('rxcui', '')
-            ])
+        writer.writerows([entity.get(col, '') for col in _ENTITY_COLS] for entity in entities)
         
-        csv_data.append([''])  # Empty row
+        writerow(('',))  # Empty row
         
         # Add interactions
         interactions = analysis_results.get('interactions', [])
+        writerow(('Drug Interactions',))
         if interactions:
-            csv_data.append(['Drug Interactions'])
-            csv_data.append(['Drug A', 'Drug B', 'Severity', 'Description'])
+            writerow(('Drug A', 'Drug B', 'Severity', 'Description'))
             
-            for interaction in interactions:
-                csv_data.append([
-                    interaction.get('drug_a', ''),
-                    interaction.get('drug_b', ''),
-                    interaction.get('severity', ''),
-                    interaction.get('description', '')
-                ])
+            writer.writerows(
+                [interaction.get(col, '') for col in _INTERACTION_COLS] for interaction in interactions
+            )
         else:
-            csv_data.append(['Drug Interactions'])
-            csv_data.append(['No significant interactions found'])
+            writerow(('No significant interactions found',))
         
-        csv_data.append([''])  # Empty row
+        writerow(('',))  # Empty row
         
         # Add dosage results
         dosage_results = analysis_results.get('dosage_results', [])
         if dosage_results:
-            csv_data.append(['Dosage Verification'])
-            csv_data.append(['Drug', 'Mentioned Dose', 'Status', 'Suggested Dose', 'Considerations'])
+            writerow(('Dosage Verification',))
+            writerow(('Drug', 'Mentioned Dose', 'Status', 'Suggested Dose', 'Considerations'))
             
-            for result in dosage_results:
-                considerations = '; '.join(result.get('considerations', []))
-                csv_data.append([
-                    result.get('drug', ''),
-                    result.get('mentioned_dose', ''),
-                    result.get('dose_status', ''),
-                    result.get('suggested_dose', ''),
-                    considerations
-                ])
-        
-        # Convert to CSV string
-        from io import StringIO
-        output = StringIO()
-        writer = csv.writer(output)
-        writer.writerows(csv_data)
+            writer.writerows(
+                [result.get(col, '') for col in _DOSAGE_COLS] + ['; '.join(result.get('considerations', []))]
+                for result in dosage_results
+            )
         
         return output.getvalue()
         
@@ -225,7 +319,7 @@ def generate_pdf_report(analysis_results: Dict[str, Any]) -> bytes:
         
         # Basic information
         pdf.set_font('Arial', '', 12)
-        pdf.cell(0, 8, f"Analysis Date: {analysis_results.get('timestamp', datetime.now().strftime('%Y-%m-%d %H:%M'))}", 0, 1)
+        pdf.cell(0, 8, f"Analysis Date: {_analysis_timestamp(analysis_results, '%Y-%m-%d %H:%M')}", 0, 1)
         pdf.cell(0, 8, f"Patient Age: {analysis_results.get('patient_age', 'Unknown')}", 0, 1)
         pdf.ln(5)
         
@@ -234,6 +328,15 @@ def generate_pdf_report(analysis_results: Dict[str, Any]) -> bytes:
         pdf.cell(0, 10, 'Drugs Identified:', 0, 1)
         pdf.set_font('Arial', '', 11)
         
+        # Bind the methods used in the per-item loops below once
+        cell, set_font, ln = pdf.cell, pdf.set_font, pdf.ln
+        multi_cell, set_x = pdf.multi_cell, pdf.set_x
+        clean = clean_text_for_pdf
+        
+        # Wrapped detail text is indented under its item
+        left_x = pdf.l_margin
+        indent_x = left_x + PDF_DETAIL_INDENT_MM
+        
         entities = analysis_results.get('entities', [])
         for i, entity in enumerate(entities, 1):
             drug_info = f"{i}. {entity.get('drug', 'Unknown')}"
@@ -243,52 +346,42 @@ def generate_pdf_report(analysis_results: Dict[str, Any]) -> bytes:
                 drug_info += f" {entity.get('frequency')}"
             
             # Clean drug info for PDF
-            drug_info = clean_text_for_pdf(drug_info)
-            pdf.cell(0, 6, drug_info, 0, 1)
+            drug_info = clean(drug_info)
+            cell(0, 6, drug_info, 0, 1)
         
-        pdf.ln(5)
+        ln(5)
         
         # Drug interactions
-        pdf.set_font('Arial', 'B', 14)
-        pdf.cell(0, 10, 'Drug Interactions:', 0, 1)
-        pdf.set_font('Arial', '', 11)
+        set_font('Arial', 'B', 14)
+        cell(0, 10, 'Drug Interactions:', 0, 1)
+        set_font('Arial', '', 11)
         
         interactions = analysis_results.get('interactions', [])
         if interactions:
             for i, interaction in enumerate(interactions, 1):
                 severity = interaction.get('severity', 'unknown').upper()
-                drug_a = clean_text_for_pdf(interaction.get('drug_a', 'Drug A'))
-                drug_b = clean_text_for_pdf(interaction.get('drug_b', 'Drug B'))
+                drug_a = clean(interaction.get('drug_a', 'Drug A'))
+                drug_b = clean(interaction.get('drug_b', 'Drug B'))
                 
-                pdf.set_font('Arial', 'B', 11)
-                pdf.cell(0, 6, f"{i}. {drug_a} with {drug_b} ({severity})", 0, 1)
-                pdf.set_font('Arial', '', 10)
+                set_font('Arial', 'B', 11)
+                cell(0, 6, f"{i}. {drug_a} with {drug_b} ({severity})", 0, 1)
+                set_font('Arial', '', 10)
                 
-                # Word wrap for description
-                description = clean_text_for_pdf(interaction.get('description', 'No description'))
-                if len(description) > 80:
-                    words = description.split()
-                    line = ""
-                    for word in words:
-                        if len(line + word) > 80:
-                            pdf.cell(0, 5, f"   {line}", 0, 1)
-                            line = word + " "
-                        else:
-                            line += word + " "
-                    if line:
-                        pdf.cell(0, 5, f"   {line}", 0, 1)
-                else:
-                    pdf.cell(0, 5, f"   {description}", 0, 1)
-                pdf.ln(2)
+                # Description, wrapped to the page width by FPDF
+                description = clean(interaction.get('description', 'No description'))
+                set_x(indent_x)
+                multi_cell(0, 5, description)
+                set_x(left_x)
+                ln(2)
         else:
-            pdf.cell(0, 6, 'No significant drug interactions found.', 0, 1)
+            cell(0, 6, 'No significant drug interactions found.', 0, 1)
         
-        pdf.ln(5)
+        ln(5)
         
         # Dosage verification
-        pdf.set_font('Arial', 'B', 14)
-        pdf.cell(0, 10, 'Dosage Verification:', 0, 1)
-        pdf.set_font('Arial', '', 11)
+        set_font('Arial', 'B', 14)
+        cell(0, 10, 'Dosage Verification:', 0, 1)
+        set_font('Arial', '', 11)
         
         dosage_results = analysis_results.get('dosage_results', [])
         if dosage_results:
@@ -298,24 +391,25 @@ def generate_pdf_report(analysis_results: Dict[str, Any]) -> bytes:
                 # Use ASCII characters instead of Unicode symbols
                 status_symbol = get_ascii_status_symbol(status)
                 
-                drug_name = clean_text_for_pdf(result.get('drug', 'Unknown'))
-                dose = clean_text_for_pdf(result.get('mentioned_dose', 'No dose'))
+                drug_name = clean(result.get('drug', 'Unknown'))
+                dose = clean(result.get('mentioned_dose', 'No dose'))
                 
-                pdf.cell(0, 6, f"{i}. {drug_name} - {dose} {status_symbol}", 0, 1)
+                cell(0, 6, f"{i}. {drug_name} - {dose} {status_symbol}", 0, 1)
                 
                 if result.get('suggested_dose'):
-                    pdf.set_font('Arial', 'I', 10)
-                    suggested = clean_text_for_pdf(result.get('suggested_dose'))
-                    pdf.cell(0, 5, f"   Suggested: {suggested}", 0, 1)
-                    pdf.set_font('Arial', '', 11)
+                    set_font('Arial', 'I', 10)
+                    suggested = clean(result.get('suggested_dose'))
+                    cell(0, 5, f"   Suggested: {suggested}", 0, 1)
+                    set_font('Arial', '', 11)
                 
                 if result.get('considerations'):
-                    pdf.set_font('Arial', '', 10)
+                    set_font('Arial', '', 10)
                     for consideration in result.get('considerations', []):
-                        clean_consideration = clean_text_for_pdf(consideration)
-                        pdf.cell(0, 5, f"   - {clean_consideration}", 0, 1)
-                    pdf.set_font('Arial', '', 11)
-                pdf.ln(2)
+                        set_x(indent_x)
+                        multi_cell(0, 5, f"- {clean(consideration)}")
+                        set_x(left_x)
+                    set_font('Arial', '', 11)
+                ln(2)
         
         # Footer
         pdf.ln(10)
@@ -323,19 +417,7 @@ def generate_pdf_report(analysis_results: Dict[str, Any]) -> bytes:
         pdf.cell(0, 6, 'DISCLAIMER: This report is for educational purposes only and should not replace professional medical advice.', 0, 1, 'C')
         pdf.cell(0, 6, 'Always consult with healthcare professionals before making medication changes.', 0, 1, 'C')
         
-        # Get PDF output and ensure it's proper bytes
-        pdf_output = pdf.output(dest='S')
-        
-        # Convert to bytes regardless of what fpdf2 returns
-        if isinstance(pdf_output, bytearray):
-            return bytes(pdf_output)
-        elif isinstance(pdf_output, str):
-            return pdf_output.encode('latin-1')
-        elif isinstance(pdf_output, bytes):
-            return pdf_output
-        else:
-            # Fallback - try to convert to bytes
-            return bytes(pdf_output)
+        return _pdf_to_bytes(pdf)
         
     except Exception as e:
         logger.error(f"Error generating PDF: {e}")
@@ -347,15 +429,7 @@ def generate_pdf_report(analysis_results: Dict[str, Any]) -> bytes:
             error_msg = clean_text_for_pdf(f'Error generating report: {str(e)}')
             pdf.cell(0, 10, error_msg, 0, 1)
             
-            pdf_output = pdf.output(dest='S')
-            
-            # Handle the output type
-            if isinstance(pdf_output, bytearray):
-                return bytes(pdf_output)
-            elif isinstance(pdf_output, str):
-                return pdf_output.encode('latin-1')
-            else:
-                return bytes(pdf_output)
+            return _pdf_to_bytes(pdf)
                 
         except Exception as fallback_error:
             logger.error(f"Fallback PDF generation also failed: {fallback_error}")
@@ -411,6 +485,14 @@ startxref
 %%EOF'''
             return minimal_pdf
 
+def _pdf_to_bytes(pdf: FPDF) -> bytes:
+    """
+    Get the finished PDF document as bytes
+    """
+    if _FPDF_RETURNS_BYTES:
+        return bytes(pdf.output())
+    return pdf.output(dest='S').encode('latin-1')
+
 def clean_text_for_pdf(text: str) -> str:
     """
     Clean text for PDF generation by removing/replacing Unicode characters
@@ -418,55 +500,14 @@ def clean_text_for_pdf(text: str) -> str:
     if not text:
         return ""
     
-    # Dictionary of Unicode characters to ASCII replacements
-    unicode_replacements = {
-        '✓': '[OK]',
-        '✅': '[OK]',
-        '❌': '[ERROR]',
-        '⚠': '[WARNING]',
-        '⚠️': '[WARNING]',
-        '💊': '[DRUG]',
-        '🔴': '[HIGH]',
-        '🟡': '[MEDIUM]',
-        '🟢': '[LOW]',
-        '→': '->',
-        '←': '<-',
-        '↔': '<->',
-        '•': '-',
-        '·': '-',
-        '"': '"',
-        '"': '"',
-        ''': "'",
-        ''': "'",
-        '–': '-',
-        '—': '-',
-        '…': '...',
-        '°': ' degrees',
-        '±': '+/-',
-        '×': 'x',
-        '÷': '/',
-        '≤': '<=',
-        '≥': '>=',
-        '≠': '!=',
-        '≈': '~=',
-        '∞': 'infinity',
-        'α': 'alpha',
-        'β': 'beta',
-        'γ': 'gamma',
-        'δ': 'delta',
-        'ε': 'epsilon',
-        'μ': 'micro',
-        'π': 'pi',
-        'σ': 'sigma',
-        'Ω': 'omega'
-    }
-    
-    # Replace Unicode characters
-    for unicode_char, ascii_replacement in unicode_replacements.items():
-        text = text.replace(unicode_char, ascii_replacement)
-    
-    # Remove any remaining non-ASCII characters
-    text = ''.join(char if ord(char) < 128 else '?' for char in text)
+    # Every replacement key is non-ASCII, so plain ASCII text only needs spacing fixed
+    if not text.isascii():
+        # Replace Unicode characters
+        text = _PDF_MULTICHAR_RE.sub(lambda match: _PDF_MULTICHAR[match.group(0)], text)
+        text = text.translate(_PDF_TRANSLATION)
+        
+        # Replace any remaining non-ASCII characters with '?'
+        text = text.encode('ascii', 'replace').decode('ascii')
     
     # Clean up multiple spaces
     text = ' '.join(text.split())
@@ -477,16 +518,7 @@ def get_ascii_status_symbol(status: str) -> str:
     """
     Get ASCII status symbol for dosage verification
     """
-    status_map = {
-        'appropriate': '[OK]',
-        'valid': '[OK]',
-        'too_low': '[LOW]',
-        'too_high': '[HIGH]',
-        'borderline': '[REVIEW]',
-        'unknown': '[?]',
-        'error': '[ERROR]'
-    }
-    return status_map.get(status, '[?]')
+    return _STATUS_MAP.get(status, '[?]')
 
 def save_uploaded_file(uploaded_file, upload_dir: str = "data/uploads/prescriptions") -> str:
     """
@@ -503,9 +535,9 @@ def save_uploaded_file(uploaded_file, upload_dir: str = "data/uploads/prescripti
         
         file_path = upload_path / filename
         
-        # Save file
+        # Save file, streaming it in chunks rather than reading it all into memory
         with open(file_path, 'wb') as f:
-            f.write(uploaded_file.read())
+            shutil.copyfileobj(uploaded_file, f, UPLOAD_COPY_CHUNK_SIZE)
         
         logger.info(f"Saved uploaded file: {file_path}")
         return str(file_path)
@@ -519,8 +551,9 @@ def load_json_config(config_path: str) -> Dict[str, Any]:
     Load JSON configuration file
     """
     try:
-        with open(config_path, 'r') as f:
-            return json.load(f)
+        with open(config_path, 'rb') as f:
+            raw = f.read()
+        return orjson.loads(raw) if ORJSON_AVAILABLE else json.loads(raw)
     except Exception as e:
         logger.error(f"Error loading config from {config_path}: {e}")
         return {}
@@ -530,8 +563,12 @@ def save_json_config(config: Dict[str, Any], config_path: str) -> bool:
     Save configuration to JSON file
     """
     try:
-        with open(config_path, 'w') as f:
-            json.dump(config, f, indent=2)
+        if ORJSON_AVAILABLE:
+            data = orjson.dumps(config, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        else:
+            data = json.dumps(config, indent=2).encode('utf-8')
+        with open(config_path, 'wb') as f:
+            f.write(data)
         return True
     except Exception as e:
         logger.error(f"Error saving config to {config_path}: {e}")
@@ -582,10 +619,7 @@ def truncate_text(text: str, max_length: int = 100) -> str:
     if not text:
         return ""
     
-    if len(text) <= max_length:
-        return text
-    
-    return text[:max_length-3] + "..."
+    return text if len(text) <= max_length else text[:max_length - 3] + "..."
 
 def extract_drug_names_from_text(text: str) -> List[str]:
     """
@@ -594,20 +628,8 @@ def extract_drug_names_from_text(text: str) -> List[str]:
     if not text:
         return []
     
-    # Common drug name patterns
-    drug_patterns = [
-        r'\b[A-Z][a-z]+(?:cillin|mycin|prazole|olol|pine|zole|statin|fenac)\b',
-        r'\b(?:aspirin|ibuprofen|acetaminophen|paracetamol|morphine|codeine)\b',
-        r'\b[A-Z][a-z]{3,12}\b(?=\s+\d+\s*mg)'
-    ]
-    
-    found_drugs = []
-    for pattern in drug_patterns:
-        matches = re.findall(pattern, text, re.IGNORECASE)
-        found_drugs.extend(matches)
-    
-    # Remove duplicates and return
-    return list(set([drug.lower() for drug in found_drugs]))
+    # Each match is a single word, so one combined pass finds the same names
+    return list({drug.lower() for drug in DRUG_PATTERN.findall(text)})
 
 def create_summary_stats(analysis_results: Dict[str, Any]) -> Dict[str, Any]:
     """
@@ -618,15 +640,11 @@ def create_summary_stats(analysis_results: Dict[str, Any]) -> Dict[str, Any]:
     dosage_results = analysis_results.get('dosage_results', [])
     
     # Count severities
-    severity_counts = {'high': 0, 'medium': 0, 'low': 0}
-    for interaction in interactions:
-        severity = interaction.get('severity', 'medium')
-        if severity in severity_counts:
-            severity_counts[severity] += 1
+    severity_counts = Counter(interaction.get('severity', 'medium') for interaction in interactions)
     
     # Count dosage issues
-    dosage_issues = sum(1 for result in dosage_results 
-                       if result.get('dose_status') not in ['appropriate', 'unknown'])
+    dosage_issues = sum(1 for result in dosage_results
+                       if result.get('dose_status') not in _OK_DOSE_STATUSES)
     
     return {
         'total_drugs': len(entities),
@@ -636,7 +654,7 @@ def create_summary_stats(analysis_results: Dict[str, Any]) -> Dict[str, Any]:
         'low_severity_interactions': severity_counts['low'],
         'dosage_issues': dosage_issues,
         'drugs_with_rxcui': sum(1 for entity in entities if entity.get('rxcui')),
-        'analysis_timestamp': analysis_results.get('timestamp', datetime.now().isoformat())
+        'analysis_timestamp': _analysis_timestamp(analysis_results)
     }
 
 def test_utils():
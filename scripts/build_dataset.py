@@ -6,19 +6,25 @@ Processes raw Kaggle DDI and RxNorm data to create mapped interaction dataset
 
 import os
 import sys
+import json
+import hashlib
+import importlib.util
 import pandas as pd
 import logging
 from pathlib import Path
 from typing import Dict, List, Set, Optional
 import requests
-import time
 from tqdm import tqdm
 import re
+from concurrent.futures import ThreadPoolExecutor
 
 # Add parent directory to path to import core modules
 sys.path.append(str(Path(__file__).parent.parent))
 from core.rxcui import RxNormAPI
 
+# pyarrow is only used through pandas, so it is enough that it is installed
+PYARROW_AVAILABLE = importlib.util.find_spec('pyarrow') is not None
+
 # Set up logging
 logging.basicConfig(
     level=logging.INFO,
@@ -30,6 +36,49 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Concurrent RxNorm lookups; RxNormAPI's token bucket keeps the request rate polite
+RXCUI_LOOKUP_WORKERS = 8
+
+# Dosage amounts such as "500mg" or "0.5 ml"
+_DOSAGE_RE = re.compile(r'\d+(?:\.\d+)?\s*(?:mg|mcg|g|ml|%)')
+
+# Dosage-form and unit words stripped by normalize_drug_name
+_SUFFIX_RE = re.compile(
+    r'\b(?:tablet|tablets|cap|capsule|capsules|injection|syrup|suspension|'
+    r'cream|ointment|mg|mcg|g|ml|solution)s?\b'
+)
+
+# Converted medicine databases are cached as Parquet, keyed by a source fingerprint
+CONVERTED_CACHE_NAME = "ddi_converted"
+# Bump whenever convert_medicine_db_to_ddi changes, so old caches are rebuilt
+CONVERTER_VERSION = 1
+FINGERPRINT_BLOCK_SIZE = 64 * 1024
+
+def _normalize_series(names: pd.Series) -> pd.Series:
+    """
+    Vectorized DatasetBuilder.normalize_drug_name over a Series of names
+    """
+    return (
+        names.fillna('').astype(str)
+        .str.lower()
+        .str.strip()
+        .str.replace(_SUFFIX_RE, '', regex=True)
+        .str.replace(_DOSAGE_RE, '', regex=True)
+        .str.split()
+        .str.join(' ')
+    )
+
+def _read_csv(path: Path) -> pd.DataFrame:
+    """
+    Read a dataset CSV, using the multithreaded pyarrow parser when available
+    """
+    if PYARROW_AVAILABLE:
+        try:
+            return pd.read_csv(path, engine='pyarrow')
+        except Exception as e:
+            logger.debug(f"pyarrow could not parse {path} ({e}), using the default parser")
+    return pd.read_csv(path)
+
 class DatasetBuilder:
     """
     Build and preprocess drug interaction dataset with RxCUI mapping
@@ -83,14 +132,27 @@ class DatasetBuilder:
             return self.create_sample_ddi_dataset()
         
         try:
+            # Reuse the previous conversion when the source file is unchanged
+            fingerprint = self._source_fingerprint(ddi_file) if PYARROW_AVAILABLE else None
+            cached_df = self.load_converted_cache(fingerprint)
+            if cached_df is not None:
+                return cached_df
+            
             logger.info(f"Loading data from {ddi_file}")
-            df = pd.read_csv(ddi_file)
+            df = _read_csv(ddi_file)
             logger.info(f"Loaded {len(df)} records from dataset")
             
             # Check if this is a medicine database (has Medicine Name, Composition columns)
             if 'Medicine Name' in df.columns and 'Composition' in df.columns:
                 logger.info("Detected medicine database format. Converting to DDI dataset...")
-                return self.convert_medicine_db_to_ddi(df)
+                ddi_df = self._convert_medicine_db(df)
+                if ddi_df is None:
+                    logger.warning("No interactions generated from medicine database. Using sample data.")
+                    return self.create_sample_ddi_dataset()
+                
+                # Only real conversions are cached, never the sample fallback
+                self.save_converted_cache(ddi_df, fingerprint)
+                return ddi_df
             
             # Check if this is already a DDI dataset
             elif 'drug_a' in df.columns or ('Medicine Name' in df.columns and 'Interacting Drug' in df.columns):
@@ -105,12 +167,96 @@ class DatasetBuilder:
             logger.error(f"Error loading dataset: {e}")
             return self.create_sample_ddi_dataset()
 
+    def _source_fingerprint(self, source_file: Path) -> str:
+        """
+        Cheap fingerprint of a source file: size, mtime, first and last 64KB,
+        plus the converter version and interaction limit that shape the conversion
+        """
+        stat = source_file.stat()
+        digest = hashlib.sha256(
+            f"{CONVERTER_VERSION}:{stat.st_size}:{stat.st_mtime_ns}:{self.max_interactions}".encode()
+        )
+        
+        with open(source_file, 'rb') as f:
+            digest.update(f.read(FINGERPRINT_BLOCK_SIZE))
+            if stat.st_size > FINGERPRINT_BLOCK_SIZE:
+                f.seek(max(FINGERPRINT_BLOCK_SIZE, stat.st_size - FINGERPRINT_BLOCK_SIZE))
+                digest.update(f.read())
+        
+        return digest.hexdigest()
+
+    def load_converted_cache(self, fingerprint: Optional[str]) -> Optional[pd.DataFrame]:
+        """
+        Load a cached medicine database conversion if it matches the fingerprint
+        """
+        if not fingerprint:
+            return None
+        
+        cache_file = self.processed_dir / f"{CONVERTED_CACHE_NAME}.parquet"
+        meta_file = self.processed_dir / f"{CONVERTED_CACHE_NAME}.json"
+        
+        try:
+            with open(meta_file, 'r') as f:
+                meta = json.load(f)
+            if meta.get('fingerprint') != fingerprint:
+                return None
+            
+            ddi_df = pd.read_parquet(cache_file)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable conversion cache: {e}")
+            return None
+        
+        self.stats['source_medicines'] = meta.get('source_medicines', 0)
+        logger.info(f"Loaded {len(ddi_df)} cached drug interactions from {cache_file}")
+        return ddi_df
+
+    def save_converted_cache(self, ddi_df: pd.DataFrame, fingerprint: Optional[str]):
+        """
+        Cache a medicine database conversion as Parquet for the next build
+        """
+        if not fingerprint or ddi_df.empty:
+            return
+        
+        cache_file = self.processed_dir / f"{CONVERTED_CACHE_NAME}.parquet"
+        meta_file = self.processed_dir / f"{CONVERTED_CACHE_NAME}.json"
+        
+        try:
+            # Drop the old key first and write the new one last, so a partially
+            # written Parquet file is never trusted
+            meta_file.unlink(missing_ok=True)
+            ddi_df.to_parquet(cache_file)
+            
+            with open(meta_file, 'w') as f:
+                json.dump({
+                    'fingerprint': fingerprint,
+                    'source_medicines': self.stats['source_medicines']
+                }, f, indent=2)
+            
+            logger.info(f"Cached converted interactions to {cache_file}")
+        except Exception as e:
+            logger.warning(f"Could not cache converted interactions: {e}")
+
     def convert_medicine_db_to_ddi(self, medicine_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Convert medicine database to DDI dataset, falling back to the sample
+        dataset when no interactions can be generated
+        """
+        ddi_df = self._convert_medicine_db(medicine_df)
+        if ddi_df is None:
+            logger.warning("No interactions generated from medicine database. Using sample data.")
+            return self.create_sample_ddi_dataset()
+        return ddi_df
+
+    def _convert_medicine_db(self, medicine_df: pd.DataFrame) -> Optional[pd.DataFrame]:
         """
         Convert medicine database to DDI dataset by creating interactions based on:
         1. Common drug combinations
         2. Side effects analysis
         3. Composition conflicts
+        
+        Returns None when no interactions could be generated.
         """
         logger.info("Converting medicine database to DDI dataset...")
         
@@ -123,8 +269,21 @@ class DatasetBuilder:
         # Extract main active ingredients
         medicine_df['Main_Ingredient'] = medicine_df['Composition'].apply(self.extract_main_ingredient)
         
+        # Lowercase the searchable text once; each drug pattern is then a single
+        # substring scan, reused by every combination that mentions it
+        search_text = (
+            medicine_df['Medicine Name'].fillna('').str.lower() + '\n' +
+            medicine_df['Main_Ingredient'].str.lower()
+        )
+        pattern_matches: Dict[str, pd.DataFrame] = {}
+        
+        def find_medicines(pattern: str) -> pd.DataFrame:
+            if pattern not in pattern_matches:
+                pattern_matches[pattern] = medicine_df[search_text.str.contains(pattern, regex=False)]
+            return pattern_matches[pattern]
+        
         # Create DDI interactions
-        interactions = []
+        interaction_frames = []
         
         # 1. Known dangerous combinations
         dangerous_combinations = [
@@ -140,32 +299,16 @@ class DatasetBuilder:
         
         # Find medicines matching dangerous combinations
         for drug_a_pattern, drug_b_pattern, description, severity in dangerous_combinations:
-            drugs_a = medicine_df[
-                medicine_df['Medicine Name'].str.contains(drug_a_pattern, case=False, na=False) |
-                medicine_df['Main_Ingredient'].str.contains(drug_a_pattern, case=False, na=False)
-            ]
-            drugs_b = medicine_df[
-                medicine_df['Medicine Name'].str.contains(drug_b_pattern, case=False, na=False) |
-                medicine_df['Main_Ingredient'].str.contains(drug_b_pattern, case=False, na=False)
-            ]
-            
-            for _, drug_a in drugs_a.iterrows():
-                for _, drug_b in drugs_b.iterrows():
-                    if drug_a['Medicine Name'] != drug_b['Medicine Name']:
-                        interactions.append({
-                            'drug_a': drug_a['Medicine Name'],
-                            'drug_b': drug_b['Medicine Name'],
-                            'description': description,
-                            'severity': severity,
-                            'mechanism': 'clinical_evidence',
-                            'sources': 'DrugBank;Clinical Studies'
-                        })
+            interaction_frames.append(self.pair_medicines(
+                find_medicines(drug_a_pattern), find_medicines(drug_b_pattern),
+                description, severity, 'clinical_evidence', 'DrugBank;Clinical Studies'
+            ))
         
         # 2. Generate interactions based on side effects overlap
-        interactions.extend(self.generate_side_effect_interactions(medicine_df))
+        interaction_frames.append(pd.DataFrame(self.generate_side_effect_interactions(medicine_df)))
         
         # 3. Generate interactions based on composition conflicts
-        interactions.extend(self.generate_composition_interactions(medicine_df))
+        interaction_frames.append(pd.DataFrame(self.generate_composition_interactions(medicine_df)))
         
         # 4. Add some beneficial combinations (low severity)
         beneficial_combinations = [
@@ -175,50 +318,36 @@ class DatasetBuilder:
         ]
         
         for drug_a_pattern, drug_b_pattern, description, severity in beneficial_combinations:
-            drugs_a = medicine_df[
-                medicine_df['Medicine Name'].str.contains(drug_a_pattern, case=False, na=False) |
-                medicine_df['Main_Ingredient'].str.contains(drug_a_pattern, case=False, na=False)
-            ]
-            drugs_b = medicine_df[
-                medicine_df['Medicine Name'].str.contains(drug_b_pattern, case=False, na=False) |
-                medicine_df['Main_Ingredient'].str.contains(drug_b_pattern, case=False, na=False)
-            ]
-            
-            for _, drug_a in drugs_a.iterrows():
-                for _, drug_b in drugs_b.iterrows():
-                    if drug_a['Medicine Name'] != drug_b['Medicine Name']:
-                        interactions.append({
-                            'drug_a': drug_a['Medicine Name'],
-                            'drug_b': drug_b['Medicine Name'],
-                            'description': description,
-                            'severity': severity,
-                            'mechanism': 'synergistic_effect',
-                            'sources': 'Clinical Guidelines'
-                        })
+            interaction_frames.append(self.pair_medicines(
+                find_medicines(drug_a_pattern), find_medicines(drug_b_pattern),
+                description, severity, 'synergistic_effect', 'Clinical Guidelines'
+            ))
         
         # Convert to DataFrame
-        if not interactions:
-            logger.warning("No interactions generated from medicine database. Using sample data.")
-            return self.create_sample_ddi_dataset()
+        interaction_frames = [frame for frame in interaction_frames if not frame.empty]
+        if not interaction_frames:
+            return None
+        
+        ddi_df = pd.concat(interaction_frames, ignore_index=True)
         
         # Limit interactions to prevent memory issues
-        if len(interactions) > self.max_interactions:
-            logger.info(f"Limiting interactions to {self.max_interactions} (from {len(interactions)})")
+        if len(ddi_df) > self.max_interactions:
+            logger.info(f"Limiting interactions to {self.max_interactions} (from {len(ddi_df)})")
             # Prioritize high and medium severity interactions
-            high_interactions = [i for i in interactions if i['severity'] == 'high']
-            medium_interactions = [i for i in interactions if i['severity'] == 'medium']
-            low_interactions = [i for i in interactions if i['severity'] == 'low']
+            high_interactions = ddi_df[ddi_df['severity'] == 'high']
+            medium_interactions = ddi_df[ddi_df['severity'] == 'medium']
+            low_interactions = ddi_df[ddi_df['severity'] == 'low']
             
             # Take proportionally
             high_count = min(len(high_interactions), self.max_interactions // 3)
             medium_count = min(len(medium_interactions), self.max_interactions // 2)
             low_count = min(len(low_interactions), self.max_interactions - high_count - medium_count)
             
-            interactions = (high_interactions[:high_count] + 
-                          medium_interactions[:medium_count] + 
-                          low_interactions[:low_count])
-        
-        ddi_df = pd.DataFrame(interactions)
+            ddi_df = pd.concat([
+                high_interactions[:high_count],
+                medium_interactions[:medium_count],
+                low_interactions[:low_count]
+            ], ignore_index=True)
         
         # Remove duplicates
         ddi_df = ddi_df.drop_duplicates(subset=['drug_a', 'drug_b'])
@@ -229,6 +358,26 @@ class DatasetBuilder:
         logger.info(f"Generated {len(ddi_df)} drug interactions from {len(medicine_df):,} medicines")
         return ddi_df
 
+    def pair_medicines(self, drugs_a: pd.DataFrame, drugs_b: pd.DataFrame, description: str,
+                       severity: str, mechanism: str, sources: str) -> pd.DataFrame:
+        """
+        Pair every medicine in drugs_a with every differently named one in drugs_b
+        """
+        pairs = drugs_a[['Medicine Name']].merge(
+            drugs_b[['Medicine Name']], how='cross', suffixes=('_a', '_b')
+        )
+        pairs = pairs[pairs['Medicine Name_a'] != pairs['Medicine Name_b']]
+        
+        return pairs.rename(columns={
+            'Medicine Name_a': 'drug_a',
+            'Medicine Name_b': 'drug_b'
+        }).assign(
+            description=description,
+            severity=severity,
+            mechanism=mechanism,
+            sources=sources
+        )
+
     def extract_main_ingredient(self, composition: str) -> str:
         """
         Extract main active ingredient from composition string
@@ -240,7 +389,7 @@ class DatasetBuilder:
         composition = str(composition).lower()
         
         # Remove dosage information
-        composition = re.sub(r'\d+(?:\.\d+)?\s*(?:mg|mcg|g|ml|%)', '', composition)
+        composition = _DOSAGE_RE.sub('', composition)
         
         # Split by common separators and take first ingredient
         separators = ['+', ',', '/', '&', 'and', 'with']
@@ -540,17 +689,10 @@ class DatasetBuilder:
         normalized = str(drug_name).lower().strip()
         
         # Remove common suffixes and prefixes
-        suffixes = [
-            'tablet', 'tablets', 'cap', 'capsule', 'capsules',
-            'injection', 'syrup', 'suspension', 'cream', 'ointment',
-            'mg', 'mcg', 'g', 'ml', 'solution'
-        ]
-        
-        for suffix in suffixes:
-            normalized = re.sub(rf'\b{suffix}s?\b', '', normalized)
+        normalized = _SUFFIX_RE.sub('', normalized)
         
         # Remove dosage information
-        normalized = re.sub(r'\d+(?:\.\d+)?\s*(?:mg|mcg|g|ml|%)', '', normalized)
+        normalized = _DOSAGE_RE.sub('', normalized)
         
         # Remove extra whitespace
         normalized = ' '.join(normalized.split())
@@ -573,28 +715,59 @@ class DatasetBuilder:
         if normalized_name in cache:
             return cache[normalized_name]
         
+        rxcui = self._lookup_rxcui(normalized_name, [drug_name])
+        if rxcui:
+            cache[normalized_name] = rxcui
+        return rxcui
+
+    def _lookup_rxcui(self, normalized_name: str, drug_names: List[str]) -> Optional[str]:
+        """
+        Look up a normalized name, falling back to the names as written
+        """
         try:
             # Try API lookup
             rxcui = self.rxnorm_api.get_rxcui(normalized_name)
             
-            if rxcui:
-                cache[normalized_name] = rxcui
-                logger.debug(f"Mapped '{drug_name}' -> RxCUI: {rxcui}")
-                return rxcui
-            else:
-                # Try without normalization
-                rxcui = self.rxnorm_api.get_rxcui(drug_name)
+            # Try without normalization
+            for drug_name in drug_names:
                 if rxcui:
-                    cache[normalized_name] = rxcui
-                    return rxcui
-                
-                self.stats['unmapped_drugs'].add(drug_name)
-                logger.debug(f"Could not map '{drug_name}' to RxCUI")
-                return None
-                
+                    break
+                rxcui = self.rxnorm_api.get_rxcui(drug_name)
+            
         except Exception as e:
-            logger.warning(f"Error mapping '{drug_name}': {e}")
+            logger.warning(f"Error mapping '{normalized_name}': {e}")
             return None
+        
+        if rxcui:
+            logger.debug(f"Mapped '{normalized_name}' -> RxCUI: {rxcui}")
+        else:
+            self.stats['unmapped_drugs'].update(drug_names)
+            logger.debug(f"Could not map '{normalized_name}' to RxCUI")
+        return rxcui
+
+    def map_drugs_to_rxcui(self, drug_names: List[str]) -> Dict[str, Optional[str]]:
+        """
+        Map many drug names to RxCUIs, querying each normalized name once
+        """
+        # Names that normalize alike ("Aspirin 75mg", "aspirin") share one lookup
+        drug_names = pd.Series(drug_names, dtype=object)
+        variants: Dict[str, List[str]] = {}
+        for drug_name, normalized_name in zip(drug_names, _normalize_series(drug_names)):
+            if normalized_name:
+                variants.setdefault(normalized_name, []).append(drug_name)
+        
+        with ThreadPoolExecutor(max_workers=RXCUI_LOOKUP_WORKERS) as executor:
+            rxcuis = list(tqdm(
+                executor.map(self._lookup_rxcui, variants, variants.values()),
+                total=len(variants),
+                desc="Mapping drug names"
+            ))
+        
+        return {
+            drug_name: rxcui
+            for names, rxcui in zip(variants.values(), rxcuis)
+            for drug_name in names
+        }
 
     def process_ddi_dataset(self, ddi_df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -613,9 +786,7 @@ class DatasetBuilder:
         # Initialize result dataframe
         result_df = ddi_df.copy()
         
-        # Add RxCUI columns
-        result_df['drug_a_rxcui'] = None
-        result_df['drug_b_rxcui'] = None
+        # Add name columns
         result_df['drug_a_name'] = result_df['drug_a']
         result_df['drug_b_name'] = result_df['drug_b']
         
@@ -627,33 +798,19 @@ class DatasetBuilder:
         if 'sources' not in result_df.columns:
             result_df['sources'] = 'Manual'
         
-        # Cache for RxCUI mappings
-        rxcui_cache = {}
-        
         # Map drug names to RxCUIs with progress bar
         logger.info("Mapping drug names to RxCUIs...")
         
         total_drugs = len(result_df) * 2  # Two drugs per interaction
-        mapped_count = 0
-        
-        with tqdm(total=len(result_df), desc="Processing interactions") as pbar:
-            for idx, row in result_df.iterrows():
-                # Map drug A
-                drug_a_rxcui = self.map_drug_to_rxcui(row['drug_a'], rxcui_cache)
-                result_df.at[idx, 'drug_a_rxcui'] = drug_a_rxcui
-                if drug_a_rxcui:
-                    mapped_count += 1
-                
-                # Map drug B
-                drug_b_rxcui = self.map_drug_to_rxcui(row['drug_b'], rxcui_cache)
-                result_df.at[idx, 'drug_b_rxcui'] = drug_b_rxcui
-                if drug_b_rxcui:
-                    mapped_count += 1
-                
-                pbar.update(1)
-                
-                # Rate limiting for API calls
-                time.sleep(0.1)
+        
+        # Look up every distinct name concurrently instead of row by row
+        drug_names = pd.unique(pd.concat([result_df['drug_a'], result_df['drug_b']], ignore_index=True))
+        name_to_rxcui = self.map_drugs_to_rxcui(drug_names)
+        
+        # Add RxCUI columns
+        result_df['drug_a_rxcui'] = result_df['drug_a'].map(name_to_rxcui)
+        result_df['drug_b_rxcui'] = result_df['drug_b'].map(name_to_rxcui)
+        mapped_count = int(result_df['drug_a_rxcui'].notna().sum() + result_df['drug_b_rxcui'].notna().sum())
         
         # Update stats
         self.stats['total_interactions'] = len(result_df)
@@ -697,7 +854,6 @@ class DatasetBuilder:
             
             # Save statistics
             stats_file = self.processed_dir / "mapping_stats.json"
-            import json
             
             # Convert set to list for JSON serialization
             stats_to_save = self.stats.copy()
@@ -829,7 +985,7 @@ def main():
         
         if ddi_file.exists():
             print(f"🔍 Inspecting dataset: {ddi_file}")
-            df = pd.read_csv(ddi_file)
+            df = _read_csv(ddi_file)
             print(f"📊 Dataset contains {len(df):,} medicine records")
             print(f"📋 Columns: {', '.join(df.columns)}")
             print(f"💊 Sample medicines: {', '.join(df['Medicine Name'].head(5).tolist())}")
@@ -93,6 +93,16 @@ APP_NAME="AI Prescription Verifier"
 DEBUG=false
 MAX_FILE_SIZE_MB=10
 TESSERACT_CMD_PATH=/usr/bin/tesseract
+# Optional: directory with tessdata_fast models for faster OCR
+# TESSDATA_FAST_DIR=/usr/share/tesseract-ocr/tessdata_fast
+# Optional: use BART-large instead of the faster DistilBART summarizer
+# USE_LARGE_BART=false
+# Optional: int8-quantize the summarizer on CPU (without ONNX Runtime)
+# QUANTIZE_SUMMARIZER=false
+# Optional: torch.compile the summarizer (slower start, faster inference)
+# COMPILE_SUMMARIZER=false
+# Optional: app workers summarizing concurrently (CPU cores are split between them)
+# SUMMARIZER_CONCURRENCY=1
 """)
             print("✅ Basic environment file created")
     else:
@@ -135,7 +135,7 @@ def test_data_persistence():
         files_to_check = [
             "data/reminders/medication_reminders.json",
             "data/reminders/water_reminders.json", 
-            "data/reminders/reminder_log.json"
+            "data/reminders/reminder_log.jsonl"
         ]
         
         for file_path in files_to_check: